@@ -0,0 +1,171 @@
+"""Deterministic benchmark datasets shaped after the samples in test_data.txt."""
+import re
+import json
+import random
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from sqlalchemy import insert, text
+
+from store.database import engine, init_db
+from store.models.db_model import User, Author, Category, Book, Review, book_category
+from store.utils.counters import recompute_counters
+from store.utils.util import get_hashed_password
+
+TEST_DATA = Path(__file__).resolve().parent.parent / 'test_data.txt'
+PASSWORD = 'password123'
+CHUNK_SIZE = 5000
+
+
+@dataclass
+class DatasetSize:
+    authors: int
+    categories: int
+    books: int
+    users: int
+    reviews: int
+
+    @classmethod
+    def for_scale(cls, scale: int) -> 'DatasetSize':
+        return cls(
+            authors=100 * scale,
+            categories=20 * scale,
+            books=1000 * scale,
+            users=500 * scale,
+            reviews=5000 * scale,
+        )
+
+
+def load_templates(path: Path = TEST_DATA) -> dict[str, list[dict]]:
+    """Parse the '<kind> test data' sections of test_data.txt into lists of records"""
+    parts = re.split(r'^(\w+) test data\s*$', path.read_text(encoding='utf-8'), flags=re.M)
+    return {kind: json.loads(body) for kind, body in zip(parts[1::2], parts[2::2])}
+
+
+def _generate(size: DatasetSize, seed: int) -> dict[str, list[dict]]:
+    rng = random.Random(seed)
+    templates = load_templates()
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    password = get_hashed_password(PASSWORD)
+
+    categories = []
+    for category_id in range(1, size.categories + 1):
+        template = templates['categories'][(category_id - 1) % len(templates['categories'])]
+        categories.append({
+            "id": category_id,
+            "name": f"{template['name']} {category_id}",
+            "description": template['description'],
+            "book_count": 0,
+            "created_at": now,
+            "updated_at": now
+        })
+
+    authors = []
+    for author_id in range(1, size.authors + 1):
+        template = rng.choice(templates['authors'])
+        authors.append({
+            "id": author_id,
+            "name": f"{template['name']} {author_id}",
+            "biography": template['biography'],
+            "birth_date": date.fromisoformat(template['birth_date']) + timedelta(days=rng.randint(-3650, 3650)),
+            "country": template.get('country'),
+            "book_count": 0,
+            "created_at": now,
+            "updated_at": now
+        })
+
+    books, links = [], []
+    for book_id in range(1, size.books + 1):
+        template = rng.choice(templates['books'])
+        books.append({
+            "id": book_id,
+            "title": f"{template['title']} {book_id}",
+            "isbn": f"979{book_id:010d}",
+            "publication_date": date.fromisoformat(template['publication_date']) + timedelta(days=rng.randint(-7300, 7300)),
+            "description": template['description'],
+            "page_count": template['page_count'],
+            "language": template['language'],
+            "average_rating": 0.0,
+            "author_id": rng.randint(1, size.authors),
+            "created_at": now,
+            "updated_at": now
+        })
+        for category_id in rng.sample(range(1, size.categories + 1), k=min(len(template['category_ids']), size.categories)):
+            links.append({"book_id": book_id, "category_id": category_id})
+
+    users = []
+    for user_id in range(1, size.users + 1):
+        users.append({
+            "id": user_id,
+            "username": f"reader{user_id}",
+            "email": f"reader{user_id}@example.com",
+            "password": password,
+            "first_name": "Reader",
+            "last_name": str(user_id),
+            "review_count": 0,
+            "recent_reviews": [],
+            "created_at": now,
+            "updated_at": now
+        })
+
+    # Only the first 80% of users write reviews so benchmarks can create new ones for the rest
+    reviewers = max(1, size.users * 4 // 5)
+    reviews, reviewed = [], set()
+    while len(reviews) < min(size.reviews, reviewers * size.books):
+        pair = (rng.randint(1, reviewers), rng.randint(1, size.books))
+        if pair in reviewed:
+            continue
+        reviewed.add(pair)
+        template = rng.choice(templates['reviews'])
+        created_at = now - timedelta(minutes=rng.randint(0, 525600))
+        reviews.append({
+            "id": len(reviews) + 1,
+            "rating": float(template['rating']),
+            "title": template['title'],
+            "content": template.get('content'),
+            "user_id": pair[0],
+            "book_id": pair[1],
+            "created_at": created_at,
+            "updated_at": created_at
+        })
+
+    return {
+        "categories": categories,
+        "authors": authors,
+        "books": books,
+        "book_category": links,
+        "users": users,
+        "reviews": reviews
+    }
+
+
+async def seed(scale: int = 1, seed: int = 42) -> DatasetSize:
+    """Replace the contents of the database with a generated dataset"""
+    size = DatasetSize.for_scale(scale)
+    rows = _generate(size, seed)
+    tables = {
+        "categories": Category.__table__,
+        "authors": Author.__table__,
+        "books": Book.__table__,
+        "book_category": book_category,
+        "users": User.__table__,
+        "reviews": Review.__table__
+    }
+
+    await init_db()
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "TRUNCATE reviews, book_category, books, authors, categories, users RESTART IDENTITY CASCADE"
+        ))
+        for name, table in tables.items():
+            records = rows[name]
+            for start in range(0, len(records), CHUNK_SIZE):
+                await conn.execute(insert(table), records[start:start + CHUNK_SIZE])
+            if name != "book_category" and records:
+                await conn.execute(text(f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), {len(records)})"))
+        await recompute_counters(conn)
+
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("ANALYZE"))
+    return size
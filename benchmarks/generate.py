@@ -0,0 +1,276 @@
+"""High-volume synthetic catalog generator for scaling benchmarks.
+
+Point DATABASE_URL at a scratch database, then run for example::
+
+    python -m benchmarks.generate --books 1000000 --authors 100000 \\
+        --users 2000000 --reviews 20000000 --workers 8
+
+The database is truncated and every table is streamed in with COPY from
+parallel worker processes, each owning a disjoint id range. Reviews per book
+follow a Zipf distribution over a shuffled popularity rank, and each book's
+reviewers are distinct users. Secondary indexes are dropped for the load and
+rebuilt afterwards, then the denormalized counters and the planner statistics
+are brought up to date.
+"""
+import sys
+import math
+import time
+import random
+import asyncio
+import argparse
+from datetime import date, datetime, timedelta, timezone
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from multiprocessing import get_context
+from sqlalchemy import text
+
+from benchmarks.dataset import PASSWORD, load_templates
+from store.database import engine, init_db, create_missing_indexes
+from store.models.db_model import Base
+from store.utils.counters import COUNTER_UPDATES, MAX_ID
+from store.utils.util import get_hashed_password
+
+# Rows sent per COPY; bounds the memory held by a worker
+COPY_BATCH = 50000
+
+NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+LOADED_TABLES = ('reviews', 'book_category', 'books', 'authors', 'categories', 'users')
+
+
+class Generator:
+    """Row factories for one shard; the same seed and shard always yield the same rows"""
+
+    def __init__(self, args: argparse.Namespace, table: str, shard: int):
+        self.args = args
+        self.rng = random.Random(f"{args.random_seed}:{table}:{shard}")
+        self.templates = load_templates()
+
+    def categories(self, lo: int, hi: int):
+        for category_id in range(lo, hi):
+            template = self.templates['categories'][(category_id - 1) % len(self.templates['categories'])]
+            yield category_id, f"{template['name']} {category_id}", template['description'], NOW, NOW
+
+    def authors(self, lo: int, hi: int):
+        rng, templates = self.rng, self.templates['authors']
+        for author_id in range(lo, hi):
+            template = rng.choice(templates)
+            birth_date = date.fromisoformat(template['birth_date']) + timedelta(days=rng.randint(-3650, 3650))
+            yield (author_id, f"{template['name']} {author_id}", template['biography'], birth_date,
+                   template.get('country'), NOW, NOW)
+
+    def users(self, lo: int, hi: int):
+        password = self.args.password_hash
+        for user_id in range(lo, hi):
+            yield (user_id, f"reader{user_id}", f"reader{user_id}@example.com", password,
+                   "Reader", str(user_id), NOW, NOW)
+
+    def books(self, lo: int, hi: int, links: list):
+        rng, templates = self.rng, self.templates['books']
+        for book_id in range(lo, hi):
+            template = rng.choice(templates)
+            publication_date = date.fromisoformat(template['publication_date']) + timedelta(days=rng.randint(-7300, 7300))
+            # Popular categories collect most books, like genres in a real catalog
+            for category_id in set(rng.choices(self.args.category_weights_range, cum_weights=self.args.category_weights,
+                                               k=rng.randint(1, 3))):
+                links.append((book_id, category_id))
+            yield (book_id, f"{template['title']} {book_id}", f"979{book_id:010d}", publication_date,
+                   template['description'], template['page_count'], template['language'],
+                   rng.randint(1, self.args.authors), NOW, NOW)
+
+    def reviews(self, lo: int, hi: int):
+        rng, templates, args = self.rng, self.templates['reviews'], self.args
+        for book_id in range(lo, hi):
+            for user_id in rng.sample(range(1, args.users + 1), reviews_for_book(args, book_id, rng)):
+                template = rng.choice(templates)
+                created_at = NOW - timedelta(seconds=rng.randint(0, 5 * 365 * 86400))
+                yield (float(template['rating']), template['title'], template.get('content'),
+                       user_id, book_id, created_at, created_at)
+
+
+def popularity_rank(args: argparse.Namespace, book_id: int) -> int:
+    """Spread popularity over the id space so consecutive ids are not all bestsellers"""
+    return (book_id * args.rank_multiplier) % args.books + 1
+
+
+def reviews_for_book(args: argparse.Namespace, book_id: int, rng: random.Random) -> int:
+    expected = args.reviews * popularity_rank(args, book_id) ** -args.zipf / args.zipf_norm
+    count = int(expected) + (rng.random() < expected % 1)
+    return min(count, args.users)
+
+
+COLUMNS = {
+    'categories': ('id', 'name', 'description', 'created_at', 'updated_at'),
+    'authors': ('id', 'name', 'biography', 'birth_date', 'country', 'created_at', 'updated_at'),
+    'users': ('id', 'username', 'email', 'password', 'first_name', 'last_name', 'created_at', 'updated_at'),
+    'books': ('id', 'title', 'isbn', 'publication_date', 'description', 'page_count', 'language', 'author_id',
+              'created_at', 'updated_at'),
+    'book_category': ('book_id', 'category_id'),
+    'reviews': ('rating', 'title', 'content', 'user_id', 'book_id', 'created_at', 'updated_at'),
+}
+
+
+async def _copy(driver_conn, table: str, rows) -> int:
+    total = 0
+    rows = iter(rows)
+    while batch := list(islice(rows, COPY_BATCH)):
+        await driver_conn.copy_records_to_table(table, records=batch, columns=COLUMNS[table])
+        total += len(batch)
+    return total
+
+
+async def _load_shard(args: argparse.Namespace, table: str, shard: int, lo: int, hi: int) -> int:
+    generator = Generator(args, table, shard)
+    try:
+        async with engine.connect() as conn:
+            driver_conn = (await conn.get_raw_connection()).driver_connection
+            await driver_conn.execute("SET synchronous_commit = off")
+            async with driver_conn.transaction():
+                if table == 'books':
+                    links = []
+                    total = await _copy(driver_conn, 'books', generator.books(lo, hi, links))
+                    await _copy(driver_conn, 'book_category', links)
+                else:
+                    total = await _copy(driver_conn, table, getattr(generator, table)(lo, hi))
+        return total
+    finally:
+        await engine.dispose()
+
+
+def load_shard(task: tuple) -> tuple[str, int]:
+    args, table, shard, lo, hi = task
+    return table, asyncio.run(_load_shard(args, table, shard, lo, hi))
+
+
+# Counters grouped by the table they write; groups run concurrently, a group's statements in order
+COUNTER_GROUPS = (
+    ('author_book_count',),
+    ('category_book_count',),
+    ('user_review_count', 'user_recent_reviews'),
+    ('book_average_rating',),
+    ('book_scores', 'category_book_scores', 'category_book_scores_stale'),
+)
+
+
+async def _recompute_counters(names: tuple) -> dict[str, int]:
+    corrected = {}
+    try:
+        async with engine.begin() as conn:
+            for name in names:
+                result = await conn.execute(COUNTER_UPDATES[name], {"lo": 0, "hi": MAX_ID})
+                corrected[name] = result.rowcount
+        return corrected
+    finally:
+        await engine.dispose()
+
+
+def recompute_counters(names: tuple) -> dict[str, int]:
+    return asyncio.run(_recompute_counters(names))
+
+
+def drop_secondary_indexes(sync_conn):
+    """Drop model indexes of the loaded tables; COPY into unindexed tables is several times faster"""
+    for table in Base.metadata.sorted_tables:
+        if table.name in LOADED_TABLES:
+            for index in table.indexes:
+                index.drop(sync_conn, checkfirst=True)
+
+
+async def prepare(args: argparse.Namespace):
+    try:
+        await init_db()
+        async with engine.begin() as conn:
+            await conn.execute(text(f"TRUNCATE {', '.join(LOADED_TABLES)} RESTART IDENTITY CASCADE"))
+            await conn.run_sync(drop_secondary_indexes)
+    finally:
+        await engine.dispose()
+
+
+async def build_indexes(args: argparse.Namespace):
+    try:
+        async with engine.begin() as conn:
+            for table, count in (('categories', args.categories), ('authors', args.authors),
+                                 ('users', args.users), ('books', args.books)):
+                await conn.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), {count})"))
+            await conn.run_sync(create_missing_indexes)
+    finally:
+        await engine.dispose()
+
+
+async def finish(args: argparse.Namespace):
+    try:
+        async with engine.connect() as conn:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text("VACUUM ANALYZE"))
+    finally:
+        await engine.dispose()
+
+
+def shards(args: argparse.Namespace, table: str, count: int) -> list[tuple]:
+    # Several shards per worker keep the pool busy when shards finish unevenly
+    step = max(1, math.ceil(count / (args.workers * 4)))
+    return [(args, table, shard, lo, min(lo + step, count + 1))
+            for shard, lo in enumerate(range(1, count + 1, step))]
+
+
+def configure(args: argparse.Namespace):
+    """Derive the values every worker needs once, so shards agree on them"""
+    args.password_hash = get_hashed_password(PASSWORD)
+    args.zipf_norm = sum(rank ** -args.zipf for rank in range(1, args.books + 1))
+    args.rank_multiplier = next(m for m in range(2654435761 % max(args.books, 2), 2 ** 32)
+                                if math.gcd(m, args.books) == 1)
+    args.category_weights_range = range(1, args.categories + 1)
+    total = 0
+    args.category_weights = []
+    for rank in args.category_weights_range:
+        total += rank ** -1.0
+        args.category_weights.append(total)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0], formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog=__doc__.split('\n', 1)[1])
+    parser.add_argument('--books', type=int, default=1000000)
+    parser.add_argument('--authors', type=int, default=100000)
+    parser.add_argument('--categories', type=int, default=1000)
+    parser.add_argument('--users', type=int, default=2000000)
+    parser.add_argument('--reviews', type=int, default=20000000, help="approximate number of reviews")
+    parser.add_argument('--zipf', type=float, default=1.0, help="exponent of the reviews-per-book distribution")
+    parser.add_argument('--workers', type=int, default=4, help="parallel COPY processes")
+    parser.add_argument('--random-seed', type=int, default=42)
+    args = parser.parse_args()
+    if min(args.books, args.authors, args.categories, args.users) < 1:
+        parser.error("every table needs at least one row")
+
+    configure(args)
+    started = time.perf_counter()
+
+    def report(step: str, counts: dict):
+        print(f"{time.perf_counter() - started:8.1f}s {step}: "
+              + ", ".join(f"{name}={count}" for name, count in counts.items()), file=sys.stderr)
+
+    asyncio.run(prepare(args))
+    # Spawned workers each open their own engine; forked ones would share the parent's sockets
+    with ProcessPoolExecutor(args.workers, mp_context=get_context('spawn')) as pool:
+        # Parents before children so foreign keys hold at every step
+        for phase in (('categories', 'authors', 'users'), ('books',), ('reviews',)):
+            tasks = []
+            for table in phase:
+                tasks += shards(args, table, args.books if table in ('books', 'reviews') else getattr(args, table))
+            counts = {}
+            for table, count in pool.map(load_shard, tasks):
+                counts[table] = counts.get(table, 0) + count
+            report("loaded", counts)
+        # The counter statements rely on the review indexes
+        asyncio.run(build_indexes(args))
+        report("indexes", {})
+        counts = {}
+        for corrected in pool.map(recompute_counters, COUNTER_GROUPS):
+            counts.update(corrected)
+        report("counters", counts)
+    asyncio.run(finish(args))
+    report("statistics", {})
+
+
+if __name__ == '__main__':
+    main()
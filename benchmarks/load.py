@@ -0,0 +1,319 @@
+"""HTTP load benchmark for every router of the book store API.
+
+Point DATABASE_URL at a scratch database, then run for example::
+
+    python -m benchmarks.load --seed --scale 1 --output results.json \\
+        --baseline benchmarks/baselines/scale-1.json --threshold 0.2
+
+Requests go through httpx's ASGI transport in-process by default, or to a
+running server with --url. Each endpoint reports latency percentiles,
+throughput and, in-process, SQL statements per request. With --baseline the
+run fails when p95 latency or queries per request regress beyond the
+threshold; --save-baseline writes the results as the new baseline instead.
+Any non-2xx response fails the run, since its latency says nothing about the
+endpoint. Every request comes from one client, so the login and registration
+throttles are raised here for in-process runs; start a server benchmarked
+with --url with the same THROTTLE_* settings.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+# Before the application is imported, which reads them
+os.environ.setdefault('THROTTLE_LOGIN_IP', '1000000/1')
+os.environ.setdefault('THROTTLE_LOGIN_USERNAME', '1000000/1')
+os.environ.setdefault('THROTTLE_REGISTER_IP', '1000000/1')
+
+import httpx
+from sqlalchemy import text
+
+from benchmarks.dataset import DatasetSize, seed as seed_database
+from store.database import engine
+from store.utils.query_stats import track_queries
+from store.utils.util import generate_tokens
+
+
+@dataclass
+class Endpoint:
+    name: str
+    method: str
+    # Returns (path, json body or None, user id to authenticate as or None)
+    build: Callable[['Context'], tuple]
+
+
+@dataclass
+class Context:
+    size: DatasetSize
+    rng: random.Random
+    reviews: list = field(default_factory=list)
+    created: Counter = field(default_factory=Counter)
+    reviewed: set = field(default_factory=set)
+
+    def book(self) -> int:
+        return self.rng.randint(1, self.size.books)
+
+    def author(self) -> int:
+        return self.rng.randint(1, self.size.authors)
+
+    def category(self) -> int:
+        return self.rng.randint(1, self.size.categories)
+
+    def user(self) -> int:
+        return self.rng.randint(1, self.size.users)
+
+    def unique(self, kind: str) -> str:
+        self.created[kind] += 1
+        return f"{os.getpid()}-{time.time_ns()}-{self.created[kind]}"
+
+    def new_review_pair(self) -> tuple[int, int]:
+        # Users past the first 80% have no seeded reviews
+        first_free_user = max(1, self.size.users * 4 // 5) + 1
+        while True:
+            pair = (self.rng.randint(first_free_user, max(first_free_user, self.size.users)), self.book())
+            if pair not in self.reviewed:
+                self.reviewed.add(pair)
+                return pair
+
+
+def _book_body(ctx: Context) -> dict:
+    return {
+        "title": f"Benchmark Book {ctx.unique('book')}",
+        "isbn": ctx.unique('isbn'),
+        "publication_date": "2001-02-03",
+        "description": "A benchmark book.",
+        "page_count": 321,
+        "language": "en",
+        "author_id": ctx.author(),
+        "category_ids": [ctx.category()]
+    }
+
+
+def _user_body(ctx: Context) -> dict:
+    name = f"bench{ctx.unique('user')}"
+    return {
+        "username": name,
+        "email": f"{name}@example.com",
+        "password": "password123",
+        "first_name": "Bench",
+        "last_name": "Mark"
+    }
+
+
+def _review_update(ctx: Context) -> tuple:
+    review_id, user_id, book_id = ctx.rng.choice(ctx.reviews)
+    return f"/books/{book_id}/reviews/{review_id}", {"rating": float(ctx.rng.randint(1, 5))}, user_id
+
+
+def _review_create(ctx: Context) -> tuple:
+    user_id, book_id = ctx.new_review_pair()
+    return f"/books/{book_id}/reviews/", {"rating": 4.0, "title": "Benchmark review", "content": "Fine."}, user_id
+
+
+def _review_detail(ctx: Context) -> tuple:
+    review_id, _, book_id = ctx.rng.choice(ctx.reviews)
+    return f"/books/{book_id}/reviews/{review_id}", None, None
+
+
+def _user_detail(ctx: Context) -> tuple:
+    user_id = ctx.user()
+    return f"/users/{user_id}", None, user_id
+
+
+def _user_update(ctx: Context) -> tuple:
+    user_id = ctx.user()
+    return f"/users/{user_id}", {"first_name": "Updated"}, user_id
+
+
+ENDPOINTS = [
+    Endpoint("GET /books/", "GET", lambda ctx: ("/books/", None, None)),
+    Endpoint("GET /books/facets", "GET", lambda ctx: ("/books/facets?language=en", None, None)),
+    Endpoint("GET /books/{id}", "GET", lambda ctx: (f"/books/{ctx.book()}", None, None)),
+    Endpoint("POST /books/", "POST", lambda ctx: ("/books/", _book_body(ctx), None)),
+    Endpoint("PUT /books/{id}", "PUT", lambda ctx: (f"/books/{ctx.book()}", {"page_count": ctx.rng.randint(50, 900)}, None)),
+    Endpoint("GET /authors/", "GET", lambda ctx: ("/authors/?sort=book_count", None, None)),
+    Endpoint("GET /authors/{id}", "GET", lambda ctx: (f"/authors/{ctx.author()}", None, None)),
+    Endpoint("GET /authors/{id}/books", "GET", lambda ctx: (f"/authors/{ctx.author()}/books", None, None)),
+    Endpoint("POST /authors/", "POST", lambda ctx: ("/authors/", {
+        "name": f"Benchmark Author {ctx.unique('author')}", "biography": "Writes benchmarks.",
+        "birth_date": "1970-01-01", "country": "Nowhere"}, None)),
+    Endpoint("PUT /authors/{id}", "PUT", lambda ctx: (f"/authors/{ctx.author()}", {"country": "Elsewhere"}, None)),
+    Endpoint("GET /categories/", "GET", lambda ctx: ("/categories/", None, None)),
+    Endpoint("GET /categories/{id}", "GET", lambda ctx: (f"/categories/{ctx.category()}", None, None)),
+    Endpoint("POST /categories/", "POST", lambda ctx: ("/categories/", {
+        "name": f"Benchmark Category {ctx.unique('category')}", "description": "Benchmarks."}, None)),
+    Endpoint("PUT /categories/{id}", "PUT", lambda ctx: (f"/categories/{ctx.category()}", {"description": "Updated."}, None)),
+    Endpoint("GET /users/", "GET", lambda ctx: ("/users/", None, None)),
+    Endpoint("GET /users/{id}", "GET", _user_detail),
+    Endpoint("POST /users/", "POST", lambda ctx: ("/users/", _user_body(ctx), None)),
+    Endpoint("PUT /users/{id}", "PUT", _user_update),
+    Endpoint("GET /books/{id}/reviews/", "GET", lambda ctx: (f"/books/{ctx.book()}/reviews/", None, None)),
+    Endpoint("GET /books/{id}/reviews/{id}", "GET", _review_detail),
+    Endpoint("POST /books/{id}/reviews/", "POST", _review_create),
+    Endpoint("PUT /books/{id}/reviews/{id}", "PUT", _review_update),
+    Endpoint("POST /auth/token/", "POST", lambda ctx: ("/auth/token/", {
+        "username": f"reader{ctx.user()}", "password": "password123"}, None)),
+    Endpoint("POST /auth/register/", "POST", lambda ctx: ("/auth/register/", _user_body(ctx), None)),
+]
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run_endpoint(client: httpx.AsyncClient, endpoint: Endpoint, ctx: Context,
+                       requests: int, concurrency: int, in_process: bool) -> dict:
+    latencies, statuses, queries, db_seconds = [], Counter(), [], []
+    remaining = requests
+    tokens = {}
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            path, body, user_id = endpoint.build(ctx)
+            headers = {}
+            if user_id is not None:
+                if user_id not in tokens:
+                    tokens[user_id] = generate_tokens(user_id).access_token
+                headers["Authorization"] = f"Bearer {tokens[user_id]}"
+            stats = track_queries() if in_process else None
+            started = time.perf_counter()
+            response = await client.request(endpoint.method, path, json=body, headers=headers)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+            if stats is not None:
+                queries.append(stats.count)
+                db_seconds.append(stats.seconds)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": requests,
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1e3, 2),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1e3, 2),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1e3, 2),
+        "queries_per_request": round(statistics.mean(queries), 2) if queries else None,
+        "db_ms_per_request": round(statistics.mean(db_seconds) * 1e3, 2) if db_seconds else None,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+async def run(args) -> dict:
+    size = DatasetSize.for_scale(args.scale)
+    if args.seed:
+        print(f"Seeding scale {args.scale}: {size}", file=sys.stderr)
+        await seed_database(args.scale, args.random_seed)
+
+    ctx = Context(size=size, rng=random.Random(args.random_seed))
+    async with engine.connect() as conn:
+        result = await conn.execute(text("SELECT id, user_id, book_id FROM reviews ORDER BY id LIMIT 10000"))
+        ctx.reviews = [tuple(row) for row in result]
+
+    selected = [endpoint for endpoint in ENDPOINTS
+                if not args.endpoints or any(pattern in endpoint.name for pattern in args.endpoints)]
+    if not ctx.reviews:
+        selected = [endpoint for endpoint in selected if "reviews/{id}" not in endpoint.name]
+
+    results = {}
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+            for endpoint in selected:
+                results[endpoint.name] = await run_endpoint(client, endpoint, ctx, args.requests, args.concurrency, False)
+                print(f"{endpoint.name:32} {results[endpoint.name]}", file=sys.stderr)
+    else:
+        from store.main import app
+
+        # ASGITransport does not send lifespan events, so run startup and shutdown here
+        async with app.router.lifespan_context(app):
+            await asyncio.sleep(args.warmup)
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=args.timeout) as client:
+                for endpoint in selected:
+                    results[endpoint.name] = await run_endpoint(client, endpoint, ctx, args.requests, args.concurrency, True)
+                    print(f"{endpoint.name:32} {results[endpoint.name]}", file=sys.stderr)
+
+    return {
+        "scale": args.scale,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "mode": "http" if args.url else "asgi",
+        "endpoints": results,
+    }
+
+
+def failed_requests(results: dict) -> list[str]:
+    """List the endpoints that answered any request with a non-2xx status"""
+    return [f"{name}: statuses {current['statuses']}" for name, current in results["endpoints"].items()
+            if any(not 200 <= int(code) < 300 for code in current["statuses"])]
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """List failed endpoints and those whose p95 latency or queries per request regressed beyond threshold"""
+    regressions = failed_requests(results)
+    for name, current in results["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if not previous:
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if previous.get("queries_per_request") is not None and current.get("queries_per_request") is not None \
+                and current["queries_per_request"] > previous["queries_per_request"]:
+            regressions.append(f"{name}: queries/request {previous['queries_per_request']} -> {current['queries_per_request']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0], formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog=__doc__.split('\n', 1)[1])
+    parser.add_argument('--scale', type=int, default=1, help="dataset scale factor (see DatasetSize.for_scale)")
+    parser.add_argument('--seed', action='store_true', help="truncate and reseed the database before running")
+    parser.add_argument('--random-seed', type=int, default=42)
+    parser.add_argument('--requests', type=int, default=200, help="requests per endpoint")
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--warmup', type=float, default=2, help="seconds to let startup tasks (facet index) finish")
+    parser.add_argument('--url', help="benchmark a running server instead of the app in-process")
+    parser.add_argument('--endpoints', nargs='*', help="only run endpoints whose name contains one of these")
+    parser.add_argument('--output', help="write results as JSON to this file")
+    parser.add_argument('--baseline', help="baseline JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed relative p95 regression")
+    parser.add_argument('--save-baseline', action='store_true', help="write the results to --baseline instead of comparing")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline and args.save_baseline:
+        failures = failed_requests(results)
+        if failures:
+            for failure in failures:
+                print(f"FAILED {failure}", file=sys.stderr)
+            sys.exit(1)
+        Path(args.baseline).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.baseline).write_text(output + "\n")
+    elif args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
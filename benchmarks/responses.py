@@ -0,0 +1,82 @@
+"""Compare response serialization for GET /books/ before and after ModelResponse.
+
+Run with ``python -m benchmarks.responses [--books N] [--iterations N]``. The
+"before" path is what FastAPI does with a returned list: validate it against
+response_model, then encode it with the stdlib JSON encoder.
+"""
+import os
+import asyncio
+import argparse
+import time
+from datetime import date, datetime, timezone
+
+os.environ.setdefault('ALGORITHM', 'HS256')
+os.environ.setdefault('JWT_SECRET_KEY', 'benchmark-access-secret-key-0123456789abcdef')
+os.environ.setdefault('JWT_REFRESH_SECRET_KEY', 'benchmark-refresh-secret-key-0123456789abcdef')
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from store.models.book_model import BooksResponse
+from store.utils.responses import ModelResponse
+
+
+def build_books(count: int) -> list[BooksResponse]:
+    now = datetime.now(timezone.utc)
+    return [BooksResponse(
+        id=book_id,
+        title=f"Book {book_id}",
+        isbn=f"978{book_id:010d}",
+        publication_date=date(1950 + book_id % 70, 1 + book_id % 12, 1 + book_id % 28),
+        description="A dystopian novel about totalitarianism. " * 4,
+        page_count=100 + book_id % 700,
+        language="en",
+        author={"id": book_id % 500 + 1, "name": f"Author {book_id % 500 + 1}"},
+        categories=[{"id": 1, "name": "Fiction"}, {"id": 2 + book_id % 10, "name": "Classics"}],
+        average_rating=round(book_id % 50 / 10, 1),
+        created_at=now,
+        updated_at=now
+    ) for book_id in range(1, count + 1)]
+
+
+async def fastapi_path(books, field) -> bytes:
+    content = await serialize_response(field=field, response_content=books)
+    return JSONResponse(content).body
+
+
+async def model_response_path(books, field) -> bytes:
+    return ModelResponse(books, list[BooksResponse]).body
+
+
+async def measure(render, books, field, iterations: int) -> float:
+    await render(books, field)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await render(books, field)
+    return (time.perf_counter() - started) / iterations
+
+
+async def run(book_count: int, iterations: int):
+    books = build_books(book_count)
+    field = create_model_field(name="response", type_=list[BooksResponse], mode="serialization")
+
+    before = await measure(fastapi_path, books, field, iterations)
+    after = await measure(model_response_path, books, field, iterations)
+
+    print(f"GET /books/ with {book_count} books, {iterations} iterations")
+    print(f"validate + json encode: {before * 1e3:8.2f} ms/response")
+    print(f"ModelResponse:          {after * 1e3:8.2f} ms/response")
+    print(f"speedup:                {before / after:8.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--books', type=int, default=1000)
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.books, args.iterations))
+
+
+if __name__ == '__main__':
+    main()
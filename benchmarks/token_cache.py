@@ -0,0 +1,43 @@
+"""Measure the per-request CPU cost of access token validation.
+
+Run with ``python -m benchmarks.token_cache [--iterations N]``. Set
+``JWT_BACKEND=pyjwt`` to compare the PyJWT backend against python-jose.
+"""
+import os
+import argparse
+import timeit
+
+os.environ.setdefault('ALGORITHM', 'HS256')
+os.environ.setdefault('JWT_SECRET_KEY', 'benchmark-access-secret-key-0123456789abcdef')
+os.environ.setdefault('JWT_REFRESH_SECRET_KEY', 'benchmark-refresh-secret-key-0123456789abcdef')
+
+from store.utils import util
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    token = util.generate_tokens(1).access_token
+
+    def uncached():
+        util.token_cache.clear()
+        util.validate_token(token, "access token")
+
+    def cached():
+        util.validate_token(token, "access token")
+
+    cached()
+    clear_cost = timeit.timeit(util.token_cache.clear, number=args.iterations)
+    uncached_cost = timeit.timeit(uncached, number=args.iterations) - clear_cost
+    cached_cost = timeit.timeit(cached, number=args.iterations)
+
+    print(f"backend: {util.JWT_BACKEND}, iterations: {args.iterations}")
+    print(f"decode + verify: {uncached_cost / args.iterations * 1e6:8.2f} us/request")
+    print(f"cached:          {cached_cost / args.iterations * 1e6:8.2f} us/request")
+    print(f"speedup:         {uncached_cost / cached_cost:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,43 @@
+import asyncio
 import uvicorn
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 
-from store.database import init_db
+from store.database import init_db, prewarm_pool
 from store.routers.book_router import book_router
 from store.routers.author_router import author_router
 from store.routers.user_router import user_router
 from store.routers.review_router import review_router
 from store.routers.category_router import category_router
 from store.routers.auth_router import auth_router
+from store.routers.change_router import change_router
+from store.utils.facets import facet_index
+from store.utils.invalidation import invalidation_bus
+from store.utils.scheduler import scheduler
+from store.utils.metrics import MetricsMiddleware, metrics_response, mark_worker_stopped
+from store.utils.profiling import PROFILE_DIR, ProfilingMiddleware
+from store.utils.deadlines import DeadlineMiddleware
+from store.utils.load_shedding import LoadSheddingMiddleware
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
+    await prewarm_pool()
+    facets_task = facet_index.schedule_rebuild()
+    invalidation_task = asyncio.create_task(invalidation_bus.run())
+    scheduler_task = asyncio.create_task(scheduler.run())
     yield
+    facets_task.cancel()
+    invalidation_task.cancel()
+    scheduler_task.cancel()
+    mark_worker_stopped()
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(DeadlineMiddleware)
+app.add_middleware(LoadSheddingMiddleware)
+app.add_middleware(MetricsMiddleware)
+if PROFILE_DIR:
+    app.add_middleware(ProfilingMiddleware)
 
 app.include_router(book_router)
 app.include_router(author_router)
@@ -23,10 +45,15 @@ app.include_router(user_router)
 app.include_router(review_router)
 app.include_router(category_router)
 app.include_router(auth_router)
+app.include_router(change_router)
 
 @app.get("/")
 async def root():
     return "Book server is up and running"
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return metrics_response()
+
 if __name__ == "__main__":
     uvicorn.run("store.main:app", host="127.0.0.1", port=8000, reload=True)
\ No newline at end of file
@@ -3,6 +3,7 @@ from datetime import date
 from pydantic import BaseModel, Field
 
 from store.models.base_model import CreateUpdateSchema, BookBaseSchema
+from store.models.category_model import CategorysResponse
    
 class AuthorBooksSchema(BookBaseSchema):
     isbn: str = Field(..., examples=["9780547928227"])
@@ -40,6 +41,10 @@ class AuthorUpdateResponse(CreateUpdateSchema):
     country: Optional[str] = Field(None, examples=["India"])
     book_count : int = Field(0, examples=[6])
 
+class AuthorIncluded(BaseModel):
+    categories : Optional[list[CategorysResponse]] = Field(None)
+    rating_histogram : Optional[dict[str, int]] = Field(None, examples=[{"3": 5, "4": 61, "5": 102}])
+
 class AuthorResponse(CreateUpdateSchema):
     name: str = Field(..., examples=["Stephen King"])
     biography: str = Field(..., examples=["Stephen Edwin King is an American author of horror, supernatural fiction, suspense, crime, science-fiction, and fantasy novels."])
@@ -50,6 +55,8 @@ class AuthorResponse(CreateUpdateSchema):
     books : list[AuthorBooksSchema] = Field([], examples=[[
         AuthorBooksSchema(id=1, title="The Hobbit", isbn="9780547928227", publication_date="1937-09-21"),
         AuthorBooksSchema(id=2, title="The Book Thief", isbn="9782547928527", publication_date="1961-11-13")]])
+    books_next_cursor : Optional[str] = Field(None, examples=["WyIxOTYxLTExLTEzIiwyXQ"])
+    included : Optional[AuthorIncluded] = Field(None)
     
 class AuthorsResponse(CreateUpdateSchema):
     name: str = Field(..., examples=["Stephen King"])
@@ -1,6 +1,9 @@
+from typing import Generic, Optional, TypeVar
 from pydantic import BaseModel, Field
 from datetime import datetime, timezone
 
+T = TypeVar('T')
+
 class BaseSchema(BaseModel):
     id: int = Field(..., examples=[1])
     name: str = Field(..., examples=["F. Scott Fitzgerald"])
@@ -22,3 +25,6 @@ class CreateUpdateSchema(BaseModel):
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class PageSchema(BaseModel, Generic[T]):
+    results: list[T] = Field([])
+    next_cursor: Optional[str] = Field(None, examples=["WzQyXQ"])
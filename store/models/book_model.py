@@ -1,6 +1,10 @@
+from typing import Optional
 from pydantic import BaseModel, Field
 from datetime import date
-from store.models.base_model import CreateUpdateSchema, BaseSchema
+from store.models.base_model import CreateUpdateSchema, BaseSchema, BookBaseSchema
+from store.models.author_model import AuthorsResponse
+from store.models.category_model import CategorysResponse
+from store.models.review_model import ReviewsResponse
 
 class BookCreate(BaseModel):
     title : str = Field(..., examples=["The Great Gatsby"])
@@ -48,6 +52,12 @@ class BookUpdateResponse(CreateUpdateSchema):
         BaseSchema(id=2, name="Horror")]])
     average_rating : float = Field(0, examples=[4.6])
 
+class BookIncluded(BaseModel):
+    author : Optional[AuthorsResponse] = Field(None)
+    categories : Optional[list[CategorysResponse]] = Field(None)
+    reviews : Optional[list[ReviewsResponse]] = Field(None)
+    rating_histogram : Optional[dict[str, int]] = Field(None, examples=[{"3": 2, "4": 17, "5": 40}])
+
 class BookResponse(CreateUpdateSchema):
     title : str = Field(..., examples=["The Great Gatsby"])
     isbn : str = Field(..., examples=["9780451524935"])
@@ -60,6 +70,7 @@ class BookResponse(CreateUpdateSchema):
         BaseSchema(id=1, name="Fiction"), 
         BaseSchema(id=2, name="Horror")]])
     average_rating : float = Field(0, examples=[4.6])
+    included : Optional[BookIncluded] = Field(None)
 
 class BooksResponse(CreateUpdateSchema):
     title : str = Field(..., examples=["The Great Gatsby"])
@@ -74,4 +85,26 @@ class BooksResponse(CreateUpdateSchema):
         BaseSchema(id=2, name="Horror")]])
     average_rating : float = Field(0, examples=[4.6])
 
+class BookFacetsResponse(BaseModel):
+    total : int = Field(..., examples=[1234])
+    book_ids : list[int] = Field([], examples=[[3, 17, 42]])
+    facets : dict[str, dict[str, int]] = Field({}, examples=[{
+        "language": {"en": 1234, "fr": 87},
+        "decade": {"2010": 1234, "2000": 311},
+        "category": {"3": 1234, "1": 640}}])
+
+class SimilarBookSchema(BookBaseSchema):
+    author: BaseSchema = Field(..., examples=[BaseSchema(id=1, name="F. Scott Fitzgerald")])
+    average_rating: float = Field(0, examples=[4.2])
+    score: float = Field(..., examples=[0.37])
 
+class SimilarBooksResponse(BaseModel):
+    book_id: int = Field(..., examples=[1])
+    source: str = Field(..., examples=["ratings"])
+    results: list[SimilarBookSchema] = Field([])
+
+class RankedBookSchema(BookBaseSchema):
+    author: BaseSchema = Field(..., examples=[BaseSchema(id=1, name="F. Scott Fitzgerald")])
+    average_rating: float = Field(0, examples=[4.2])
+    review_count: int = Field(0, examples=[118])
+    score: float = Field(..., examples=[4.11])
@@ -0,0 +1,20 @@
+from typing import Optional, Union
+from datetime import datetime
+from pydantic import BaseModel, Field
+
+from store.models.author_model import AuthorsResponse
+from store.models.book_model import BooksResponse
+from store.models.category_model import CategorysResponse
+from store.models.review_model import ReviewsResponse
+
+class ChangeSchema(BaseModel):
+    type: str = Field(..., examples=["book"])
+    id: int = Field(..., examples=[42])
+    changed_at: datetime = Field(..., examples=["2025-03-01T12:00:00Z"])
+    # Current state of the entity, or None when it no longer exists
+    data: Optional[Union[BooksResponse, AuthorsResponse, CategorysResponse, ReviewsResponse]] = Field(None)
+
+class ChangesResponse(BaseModel):
+    results: list[ChangeSchema] = Field([])
+    next_cursor: str = Field(..., examples=["WzEyMzQ1LDY3OF0"])
+    has_more: bool = Field(False, examples=[False])
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, Table, Date, ARRAY
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Float, DateTime, ForeignKey, Table, Date, ARRAY, Index, REAL, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.dialects.postgresql import JSONB
@@ -12,7 +12,10 @@ book_category = Table(
     'book_category',
     Base.metadata,
     Column('book_id', Integer, ForeignKey('books.id', ondelete='CASCADE')),
-    Column('category_id', Integer, ForeignKey('categories.id', ondelete='CASCADE'))
+    Column('category_id', Integer, ForeignKey('categories.id', ondelete='CASCADE')),
+    # The categories of a book, and the books of a category
+    Index('ix_book_category_book_category', 'book_id', 'category_id'),
+    Index('ix_book_category_category_book', 'category_id', 'book_id')
 )
 
 class User(Base):
@@ -32,6 +35,11 @@ class User(Base):
     # Relationships
     reviews = relationship("Review", back_populates="user", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # username_prefix search, see store.utils.pagination.prefix_range
+        Index('ix_users_username_c', text('username COLLATE "C"')),
+    )
+
 class Author(Base):
     __tablename__ = "authors"
 
@@ -48,6 +56,15 @@ class Author(Base):
     # Relationships
     books = relationship("Book", back_populates="author", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Author listing filters and the book_count sort, each walked in keyset order
+        Index('ix_authors_country_id', 'country', 'id'),
+        Index('ix_authors_birth_date_id', 'birth_date', 'id'),
+        Index('ix_authors_book_count_id', 'book_count', 'id'),
+        # name_prefix search, see store.utils.pagination.prefix_range
+        Index('ix_authors_name_c', text('name COLLATE "C"')),
+    )
+
 class Category(Base):
     __tablename__ = "categories"
 
@@ -61,6 +78,12 @@ class Category(Base):
     # Relationships
     books = relationship("Book", secondary=book_category, back_populates="categories")
 
+    __table_args__ = (
+        Index('ix_categories_book_count_id', 'book_count', 'id'),
+        # name_prefix search, see store.utils.pagination.prefix_range
+        Index('ix_categories_name_c', text('name COLLATE "C"')),
+    )
+
 class Book(Base):
     __tablename__ = "books"
 
@@ -81,6 +104,11 @@ class Book(Base):
     categories = relationship("Category", secondary=book_category, back_populates="books")
     reviews = relationship("Review", back_populates="book", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Author bibliographies, paged in publication order
+        Index('ix_books_author_publication', 'author_id', 'publication_date', 'id'),
+    )
+
 class Review(Base):
     __tablename__ = "reviews"
 
@@ -95,4 +123,69 @@ class Review(Base):
 
     # Relationships
     user = relationship("User", back_populates="reviews")
-    book = relationship("Book", back_populates="reviews")
\ No newline at end of file
+    book = relationship("Book", back_populates="reviews")
+
+    __table_args__ = (
+        # Newest-first review lists of a book and of a user (recent_reviews)
+        Index('ix_reviews_book_created', 'book_id', 'created_at'),
+        Index('ix_reviews_user_created', 'user_id', 'created_at', 'id'),
+    )
+
+class BookScore(Base):
+    __tablename__ = "book_scores"
+
+    # Ranking signals updated with every review write, see store.utils.book_scores
+    book_id = Column(Integer, ForeignKey("books.id", ondelete="CASCADE"), primary_key=True)
+    review_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Float, nullable=False, default=0)
+    bayesian_rating = Column(Float, nullable=False)
+    trending_score = Column(Float, nullable=False)
+
+    __table_args__ = (
+        # Top rated and trending lists, walked in keyset order
+        Index('ix_book_scores_bayesian', 'bayesian_rating', 'book_id'),
+        Index('ix_book_scores_trending', 'trending_score', 'book_id'),
+    )
+
+class CategoryBookScore(Base):
+    __tablename__ = "category_book_scores"
+
+    # book_scores.bayesian_rating copied to each category of the book, so the top rated books
+    # of one category are a range of one index instead of a filter over the whole ranking
+    category_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    book_id = Column(Integer, ForeignKey("books.id", ondelete="CASCADE"), primary_key=True)
+    bayesian_rating = Column(Float, nullable=False)
+
+    __table_args__ = (
+        Index('ix_category_book_scores_bayesian', 'category_id', 'bayesian_rating', 'book_id'),
+    )
+
+class ChangeLog(Base):
+    __tablename__ = "change_log"
+
+    id = Column(BigInteger, primary_key=True)
+    # Transaction that wrote the entry; the change feed pages by (txid, id)
+    txid = Column(BigInteger, nullable=False, server_default=text("txid_current()"))
+    entity_type = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    changed_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True)
+
+    __table_args__ = (
+        Index('ix_change_log_txid_id', 'txid', 'id'),
+    )
+
+class BookSimilarity(Base):
+    __tablename__ = "book_similarities"
+
+    # Precomputed "readers also liked" neighbors, best first, rebuilt by store.similarity
+    book_id = Column(Integer, ForeignKey("books.id", ondelete="CASCADE"), primary_key=True)
+    similar_book_ids = Column(ARRAY(Integer), nullable=False)
+    scores = Column(ARRAY(REAL), nullable=False)
+    computed_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+class ScheduledJob(Base):
+    __tablename__ = "scheduled_jobs"
+
+    # Start of the latest completed run of each scheduled job, see store.utils.scheduler
+    name = Column(String, primary_key=True)
+    last_run_at = Column(DateTime(timezone=True), nullable=False)
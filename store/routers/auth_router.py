@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from store.database import get_database
@@ -6,6 +6,7 @@ from store.database import get_database
 from store.models.user_model import UserCreate
 from store.models.auth_model import TokenResponse, TokenPayload, PasswordReset, UserLogin
 from store.services.auth_service import AuthService
+from store.utils.throttle import enforce_login_throttle, enforce_register_throttle
 
 auth_router = APIRouter(prefix='/auth', tags=['Auth'])
 
@@ -17,7 +18,8 @@ auth_router = APIRouter(prefix='/auth', tags=['Auth'])
     description="Authenticates a user and returns access and refresh tokens"
 )
 async def login(
-    user_credentials: UserLogin, db: AsyncSession = Depends(get_database)):
+    request: Request, user_credentials: UserLogin, db: AsyncSession = Depends(get_database)):
+    await enforce_login_throttle(request.client.host if request.client else "unknown", user_credentials.username)
     service = AuthService(db)
     return await service.login_user(user_credentials)
 
@@ -41,7 +43,8 @@ async def login(
     description="Register a new user and return access and refresh tokens"
 )
 async def register_user(
-    user_data: UserCreate, db: AsyncSession = Depends(get_database) ):
+    request: Request, user_data: UserCreate, db: AsyncSession = Depends(get_database) ):
+    await enforce_register_throttle(request.client.host if request.client else "unknown")
     service = AuthService(db)
     return await service.register_user(user_data)
 
@@ -1,18 +1,27 @@
-from fastapi import APIRouter, Depends
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from store.database import get_database
 from store.utils.dependencies import get_current_user
 from store.models.auth_model import TokenPayload
 from store.services.author_service import AuthorService
-from store.models.author_model import AuthorCreate, AuthorUpdate, AuthorCreateResponse, AuthorUpdateResponse, AuthorResponse, AuthorsResponse
+from store.utils.responses import ModelResponse
+from store.utils.singleflight import read_flight
+from store.models.base_model import PageSchema
+from store.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from store.utils.includes import AUTHOR_INCLUDES, parse_include
+from store.models.author_model import AuthorCreate, AuthorUpdate, AuthorCreateResponse, AuthorUpdateResponse, AuthorResponse, AuthorsResponse, AuthorBooksSchema
 
 author_router = APIRouter(prefix='/authors', tags=['Authors'])
 
-@author_router.get('/', response_model=list[AuthorsResponse])
-async def retrieve_authors(db: AsyncSession = Depends(get_database)):
-    service = AuthorService(db)
-    return await service.retrieve_authors()
+@author_router.get('/', response_model=PageSchema[AuthorsResponse])
+async def retrieve_authors(limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None,
+                           country: Optional[str] = None, birth_year_min: Optional[int] = Query(None, ge=1, le=9999),
+                           birth_year_max: Optional[int] = Query(None, ge=1, le=9998), name_prefix: Optional[str] = Query(None, min_length=1),
+                           sort: Literal['id', 'book_count'] = 'id'):
+    params = (limit, cursor, country, birth_year_min, birth_year_max, name_prefix, sort)
+    return ModelResponse(await read_flight.do(("authors", *params), lambda db: AuthorService(db).retrieve_authors(*params)), PageSchema[AuthorsResponse])
 
 @author_router.post('/', response_model=AuthorCreateResponse)
 async def create_author(author: AuthorCreate, db: AsyncSession = Depends(get_database)):
@@ -20,11 +29,17 @@ async def create_author(author: AuthorCreate, db: AsyncSession = Depends(get_dat
     return await service.create_author(author)
 
 @author_router.get('/{author_id}', response_model=AuthorResponse)
-async def retrieve_author(author_id: int, db: AsyncSession = Depends(get_database)):
-    service = AuthorService(db)
-    return await service.retrieve_author(author_id)
+async def retrieve_author(author_id: int, include: Optional[str] = Query(None, description=f"Comma separated: {','.join(AUTHOR_INCLUDES)}")):
+    parts = parse_include(include, AUTHOR_INCLUDES)
+    return ModelResponse(await read_flight.do(("author", author_id, parts), lambda db: AuthorService(db).retrieve_author(author_id, parts)), AuthorResponse)
 
 @author_router.put('/{author_id}', response_model=AuthorUpdateResponse)
 async def update_author(author_id: int, author: AuthorUpdate, db: AsyncSession = Depends(get_database)):
     service = AuthorService(db)
-    return await service.update_author(author_id, author)
\ No newline at end of file
+    return await service.update_author(author_id, author)
+
+@author_router.get('/{author_id}/books', response_model=PageSchema[AuthorBooksSchema])
+async def retrieve_author_books(author_id: int, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                                cursor: Optional[str] = None):
+    return ModelResponse(await read_flight.do(("author_books", author_id, limit, cursor),
+                                              lambda db: AuthorService(db).retrieve_author_books(author_id, limit, cursor)), PageSchema[AuthorBooksSchema])
\ No newline at end of file
@@ -1,30 +1,64 @@
-from fastapi import APIRouter, Depends
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from store.database import get_database
 from store.utils.dependencies import get_current_user
 from store.models.auth_model import TokenPayload
 from store.services.book_service import BookService
-from store.models.book_model import BookCreate, BookUpdate, BookCreateResponse, BookUpdateResponse, BookResponse, BooksResponse
+from store.services.recommendation_service import RecommendationService
+from store.utils.responses import ModelResponse
+from store.utils.singleflight import read_flight
+from store.utils.facets import facet_index
+from store.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from store.utils.includes import BOOK_INCLUDES, parse_include
+from store.similarity import SIMILARITY_NEIGHBORS
+from store.models.book_model import BookCreate, BookUpdate, BookCreateResponse, BookUpdateResponse, BookResponse, BooksResponse, BookFacetsResponse, SimilarBooksResponse, RankedBookSchema
+from store.models.base_model import PageSchema
 
 book_router = APIRouter(prefix='/books', tags=['Books'])
 
 @book_router.get('/', response_model=list[BooksResponse])
-async def retrieve_books(db: AsyncSession = Depends(get_database)):
-    service = BookService(db)
-    return await service.retrieve_books()
+async def retrieve_books():
+    return ModelResponse(await read_flight.do(("books",), lambda db: BookService(db).retrieve_books()), list[BooksResponse])
 
 @book_router.post('/', response_model=BookCreateResponse)
 async def create_book(book: BookCreate, db: AsyncSession = Depends(get_database)):
     service = BookService(db)
     return await service.create_book(book)
 
+@book_router.get('/facets', response_model=BookFacetsResponse)
+async def retrieve_book_facets(language: list[str] = Query([]), decade: list[int] = Query([]),
+                               category_id: list[int] = Query([]), author_id: list[int] = Query([]),
+                               after_id: int = Query(0, ge=0), limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+    if not facet_index.ready:
+        raise HTTPException(status_code=503, detail="Facet index is not available")
+    filters = {"language": language, "decade": decade, "category": category_id, "author": author_id}
+    return ModelResponse(BookFacetsResponse(**facet_index.search(filters, after_id, limit)), BookFacetsResponse)
+
+@book_router.get('/trending', response_model=PageSchema[RankedBookSchema])
+async def retrieve_trending_books(limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None):
+    return ModelResponse(await read_flight.do(("trending_books", limit, cursor),
+                                              lambda db: BookService(db).retrieve_trending_books(limit, cursor)), PageSchema[RankedBookSchema])
+
+@book_router.get('/top', response_model=PageSchema[RankedBookSchema])
+async def retrieve_top_books(limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None,
+                             category_id: Optional[int] = None):
+    params = (limit, cursor, category_id)
+    return ModelResponse(await read_flight.do(("top_books", *params), lambda db: BookService(db).retrieve_top_books(*params)), PageSchema[RankedBookSchema])
+
 @book_router.get('/{book_id}', response_model=BookResponse)
-async def retrieve_book(book_id: int, db: AsyncSession = Depends(get_database)):
-    service = BookService(db)
-    return await service.retrieve_book(book_id)
+async def retrieve_book(book_id: int, include: Optional[str] = Query(None, description=f"Comma separated: {','.join(BOOK_INCLUDES)}")):
+    parts = parse_include(include, BOOK_INCLUDES)
+    return ModelResponse(await read_flight.do(("book", book_id, parts), lambda db: BookService(db).retrieve_book(book_id, parts)), BookResponse)
 
 @book_router.put('/{book_id}', response_model=BookUpdateResponse)
 async def update_book(book_id: int, book: BookUpdate, db: AsyncSession = Depends(get_database)):
     service = BookService(db)
-    return await service.update_book(book_id, book)
\ No newline at end of file
+    return await service.update_book(book_id, book)
+
+@book_router.get('/{book_id}/similar', response_model=SimilarBooksResponse)
+async def retrieve_similar_books(book_id: int, limit: int = Query(10, ge=1, le=SIMILARITY_NEIGHBORS),
+                                 source: Literal['auto', 'ratings', 'content'] = 'auto'):
+    return ModelResponse(await read_flight.do(("similar_books", book_id, limit, source),
+                                              lambda db: RecommendationService(db).similar_books(book_id, limit, source)), SimilarBooksResponse)
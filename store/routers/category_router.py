@@ -1,18 +1,24 @@
-from fastapi import APIRouter, Depends
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from store.database import get_database
 from store.utils.dependencies import get_current_user
 from store.models.auth_model import TokenPayload
 from store.services.category_service import CategoryService
+from store.utils.responses import ModelResponse
+from store.utils.singleflight import read_flight
+from store.models.base_model import PageSchema
+from store.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from store.models.category_model import CategoryCreate, CategoryUpdate, CategoryCreateResponse, CategoryUpdateResponse, CategoryResponse, CategorysResponse
 
 category_router = APIRouter(prefix='/categories', tags=['Categories'])
 
-@category_router.get('/', response_model=list[CategorysResponse])
-async def retrieve_categories(db: AsyncSession = Depends(get_database)):
-    service = CategoryService(db)
-    return await service.retrieve_categories()
+@category_router.get('/', response_model=PageSchema[CategorysResponse])
+async def retrieve_categories(limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None,
+                              name_prefix: Optional[str] = Query(None, min_length=1), sort: Literal['id', 'book_count'] = 'id'):
+    params = (limit, cursor, name_prefix, sort)
+    return ModelResponse(await read_flight.do(("categories", *params), lambda db: CategoryService(db).retrieve_categories(*params)), PageSchema[CategorysResponse])
 
 @category_router.post('/', response_model=CategoryCreateResponse)
 async def create_category(category: CategoryCreate, db: AsyncSession = Depends(get_database)):
@@ -20,9 +26,8 @@ async def create_category(category: CategoryCreate, db: AsyncSession = Depends(g
     return await service.create_category(category)
 
 @category_router.get('/{category_id}', response_model=CategoryResponse)
-async def retrieve_category(category_id: int, db: AsyncSession = Depends(get_database)):
-    service = CategoryService(db)
-    return await service.retrieve_category(category_id)
+async def retrieve_category(category_id: int):
+    return ModelResponse(await read_flight.do(("category", category_id), lambda db: CategoryService(db).retrieve_category(category_id)), CategoryResponse)
 
 @category_router.put('/{category_id}', response_model=CategoryUpdateResponse)
 async def update_category(category_id: int, category: CategoryUpdate, db: AsyncSession = Depends(get_database)):
@@ -0,0 +1,19 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from store.database import get_database
+from store.services.change_service import ChangeService
+from store.utils.responses import ModelResponse
+from store.utils.change_log import CHANGE_TYPES
+from store.utils.includes import parse_include
+from store.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from store.models.change_model import ChangesResponse
+
+change_router = APIRouter(prefix='/changes', tags=['Changes'])
+
+@change_router.get('/', response_model=ChangesResponse)
+async def retrieve_changes(since: Optional[str] = None, types: Optional[str] = Query(None, description=f"Comma separated: {','.join(CHANGE_TYPES)}"),
+                           limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), db: AsyncSession = Depends(get_database)):
+    service = ChangeService(db)
+    return ModelResponse(await service.retrieve_changes(since, parse_include(types, CHANGE_TYPES, "type") or CHANGE_TYPES, limit), ChangesResponse)
@@ -1,30 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from store.database import get_database
 from store.utils.dependencies import get_current_user
 from store.models.auth_model import TokenPayload
 from store.services.user_service import UserService
+from store.utils.responses import ModelResponse
+from store.utils.singleflight import read_flight
+from store.utils.throttle import enforce_register_throttle
+from store.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from store.models.base_model import PageSchema
 from store.models.user_model import UserCreate, UserUpdate, UserCreateResponse, UserUpdateResponse, UserResponse, UsersResponse
 
 user_router = APIRouter(prefix='/users', tags=['Users'])
 
-@user_router.get('/', response_model=list[UsersResponse])
-async def retrieve_users(db: AsyncSession = Depends(get_database)):
-    service = UserService(db)
-    return await service.retrieve_users()
+@user_router.get('/', response_model=PageSchema[UsersResponse])
+async def retrieve_users(limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None,
+                         username_prefix: Optional[str] = Query(None, min_length=1)):
+    params = (limit, cursor, username_prefix)
+    return ModelResponse(await read_flight.do(("users", *params), lambda db: UserService(db).retrieve_users(*params)), PageSchema[UsersResponse])
 
 @user_router.post('/', response_model=UserCreateResponse)
-async def create_user(user: UserCreate, db: AsyncSession = Depends(get_database)):
+async def create_user(request: Request, user: UserCreate, db: AsyncSession = Depends(get_database)):
+    await enforce_register_throttle(request.client.host if request.client else "unknown")
     service = UserService(db)
     return await service.create_user(user)
 
 @user_router.get('/{user_id}', response_model=UserResponse)
-async def retrieve_user(user_id: int, db: AsyncSession = Depends(get_database), current_user: TokenPayload = Depends(get_current_user)):
+async def retrieve_user(user_id: int, current_user: TokenPayload = Depends(get_current_user)):
     if current_user.user_id != user_id:
         raise HTTPException(status_code=403, detail="Not authorized to access this user")
-    service = UserService(db)
-    return await service.retrieve_user(user_id)
+    return ModelResponse(await read_flight.do(("user", user_id), lambda db: UserService(db).retrieve_user(user_id)), UserResponse)
 
 @user_router.put('/{user_id}', response_model=UserUpdateResponse)
 async def update_user(user_id: int, user: UserUpdate, db: AsyncSession = Depends(get_database), current_user: TokenPayload = Depends(get_current_user)):
@@ -0,0 +1,148 @@
+"""Production entry point: a pre-forking supervisor around uvicorn workers.
+
+    python -m store.serve --workers 4 --port 8000
+
+The listening socket is bound and the application imported once in the
+supervisor, then each forked worker serves the shared socket with uvloop and
+httptools. SIGTERM or SIGINT stops accepting connections, lets in-flight
+requests and the application's shutdown finish within --graceful-timeout,
+and kills stragglers after that. Workers that exit unexpectedly are replaced.
+"""
+import os
+import sys
+import time
+import socket
+import signal
+import logging
+import argparse
+
+logger = logging.getLogger("store.serve")
+
+# Extra time given to a worker after its graceful timeout before it is killed
+KILL_GRACE = 10
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0], formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog=__doc__.split('\n', 1)[1])
+    parser.add_argument('--host', default=os.environ.get('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 8000)))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1)))
+    parser.add_argument('--backlog', type=int, default=int(os.environ.get('BACKLOG', 2048)),
+                        help="pending connections the kernel queues before refusing new ones")
+    parser.add_argument('--keep-alive', type=int, default=int(os.environ.get('KEEP_ALIVE', 5)),
+                        help="seconds an idle keep-alive connection stays open")
+    parser.add_argument('--graceful-timeout', type=int, default=int(os.environ.get('GRACEFUL_TIMEOUT', 30)),
+                        help="seconds in-flight requests get to finish on shutdown")
+    parser.add_argument('--access-log', action='store_true')
+    return parser.parse_args()
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def run_worker(app, sock: socket.socket, args: argparse.Namespace):
+    import uvicorn
+
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, signal.SIG_DFL)
+    config = uvicorn.Config(
+        app,
+        loop="uvloop",
+        http="httptools",
+        lifespan="on",
+        backlog=args.backlog,
+        timeout_keep_alive=args.keep_alive,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        access_log=args.access_log,
+    )
+    # uvicorn handles SIGTERM itself: stop accepting, drain connections, then run the lifespan shutdown
+    uvicorn.Server(config).run(sockets=[sock])
+
+class Supervisor:
+    """Forks the workers, replaces the ones that die and forwards shutdown signals"""
+
+    def __init__(self, app, sock: socket.socket, args: argparse.Namespace):
+        self.app = app
+        self.sock = sock
+        self.args = args
+        self.workers: dict[int, float] = {}
+        self.stopping_since = None
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(self.app, self.sock, self.args)
+            except BaseException:
+                logger.exception("Worker %d failed", os.getpid())
+                code = 1
+            finally:
+                os._exit(code)
+        self.workers[pid] = time.monotonic()
+        logger.info("Started worker %d", pid)
+
+    def stop(self, signum, frame):
+        if self.stopping_since is None:
+            logger.info("Shutting down %d workers", len(self.workers))
+            self.stopping_since = time.monotonic()
+            self.signal_workers(signal.SIGTERM)
+
+    def signal_workers(self, signum: int):
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def reap(self):
+        while self.workers:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                return
+            started = self.workers.pop(pid, None)
+            if started is None or self.stopping_since is not None:
+                continue
+            logger.warning("Worker %d exited with status %d, replacing it", pid, os.waitstatus_to_exitcode(status))
+            # Back off when workers die right after starting, e.g. the database is unreachable
+            if time.monotonic() - started < 1:
+                time.sleep(1)
+            self.spawn()
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for _ in range(self.args.workers):
+            self.spawn()
+        while self.workers:
+            time.sleep(0.2)
+            self.reap()
+            if self.stopping_since is not None and time.monotonic() - self.stopping_since > self.args.graceful_timeout + KILL_GRACE:
+                logger.warning("Killing %d workers that did not stop in time", len(self.workers))
+                self.signal_workers(signal.SIGKILL)
+                self.stopping_since = time.monotonic()
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(process)d %(levelname)s %(message)s")
+    # Production defaults, applied before the application modules read their settings
+    os.environ.setdefault('DB_ECHO', 'false')
+    os.environ.setdefault('DB_POOL_PREWARM', os.environ.get('DB_POOL_SIZE', '5'))
+
+    sock = bind_socket(args.host, args.port, args.backlog)
+    # Import the application once so workers start from a forked, fully imported process.
+    # Nothing connects to the database at import time; each worker opens its own pool.
+    from store.main import app
+
+    logger.info("Listening on %s:%d with %d workers", args.host, args.port, args.workers)
+    Supervisor(app, sock, args).run()
+    sock.close()
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
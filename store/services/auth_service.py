@@ -7,7 +7,8 @@ from sqlalchemy.future import select
 from store.models.db_model import User
 from store.models.user_model import UserCreate
 from store.models.auth_model import PasswordReset, TokenResponse, UserLogin
-from store.utils.util import get_hashed_password, verify_hashed_password, generate_tokens
+from store.utils.util import hash_password, verify_password, generate_tokens
+from store.utils.invalidation import invalidation_bus
 
 class AuthService:
     def __init__(self, db: AsyncSession):
@@ -24,7 +25,7 @@ class AuthService:
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         
-        if not verify_hashed_password(user_credentials.password, user.password):
+        if not await verify_password(user_credentials.password, user.password):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
         
         user_id = str(user.id)
@@ -59,7 +60,7 @@ class AuthService:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
         
         # Create new user
-        hashed_password = get_hashed_password(user_data.password)
+        hashed_password = await hash_password(user_data.password)
         
         new_user = User(
             username=user_data.username.lower(),
@@ -74,6 +75,7 @@ class AuthService:
         self.db.add(new_user)
         await self.db.commit()
         await self.db.refresh(new_user)
+        invalidation_bus.publish("user", new_user.id)
         
         user_id = str(new_user.id)
         return generate_tokens(user_id)
@@ -89,15 +91,16 @@ class AuthService:
         
         # If old password is provided, verify it
         if password_data.old_password:
-            if not verify_hashed_password(password_data.old_password, user.password):
+            if not await verify_password(password_data.old_password, user.password):
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Current password is incorrect")
         
         # Update password
-        hashed_password = get_hashed_password(password_data.new_password)
+        hashed_password = await hash_password(password_data.new_password)
         
         user.password = hashed_password
         user.updated_at = datetime.now(timezone.utc)
         
         await self.db.commit()
+        invalidation_bus.publish("user", user_id)
         
         return JSONResponse(status_code=status.HTTP_200_OK, content={"message": "Password updated successfully"})
\ No newline at end of file
@@ -1,22 +1,51 @@
 from fastapi import HTTPException
-from datetime import datetime, timezone
+from typing import Optional, Sequence
+from datetime import date, datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import and_, or_, tuple_
 
 from store.models.db_model import Author, Book
+from store.utils.invalidation import invalidation_bus
+from store.utils.includes import resolve_includes
+from store.utils.change_log import record_change
+from store.services.include_service import IncludeService
 from store.models.author_model import AuthorCreate, AuthorUpdate, AuthorCreateResponse
-from store.models.author_model import AuthorResponse, AuthorsResponse, AuthorBooksSchema
+from store.models.author_model import AuthorResponse, AuthorsResponse, AuthorBooksSchema, AuthorIncluded
+from store.models.base_model import PageSchema
+from store.utils.pagination import DEFAULT_PAGE_SIZE, encode_cursor, decode_cursor, keyset_query, page_cursor, prefix_range
 
 class AuthorService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def retrieve_authors(self) -> list[AuthorsResponse]:
-        # Query all authors
-        result = await self.db.execute(select(Author))
+    async def retrieve_authors(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                               country: Optional[str] = None, birth_year_min: Optional[int] = None,
+                               birth_year_max: Optional[int] = None, name_prefix: Optional[str] = None,
+                               sort: str = "id") -> PageSchema[AuthorsResponse]:
+        query = select(Author)
+        if country:
+            query = query.where(Author.country == country)
+        if birth_year_min is not None:
+            query = query.where(Author.birth_date >= date(birth_year_min, 1, 1))
+        if birth_year_max is not None:
+            query = query.where(Author.birth_date < date(birth_year_max + 1, 1, 1))
+        if name_prefix:
+            query = query.where(*prefix_range(Author.name, name_prefix))
+        
+        # Most prolific first for book_count, otherwise ascending id
+        if sort == "book_count":
+            query = keyset_query(query, [Author.book_count, Author.id], cursor, limit, descending=True)
+            cursor_keys = ["book_count", "id"]
+        else:
+            query = keyset_query(query, [Author.id], cursor, limit)
+            cursor_keys = ["id"]
+        
+        result = await self.db.execute(query)
         authors = result.scalars().all()
+        next_cursor = page_cursor(authors, limit, cursor_keys)
         
-        return [AuthorsResponse(
+        return PageSchema[AuthorsResponse](results=[AuthorsResponse(
             id=author.id,
             name=author.name,
             biography=author.biography,
@@ -26,7 +55,7 @@ class AuthorService:
             book_count=author.book_count,
             created_at=author.created_at,
             updated_at=author.updated_at
-        ) for author in authors]
+        ) for author in authors[:limit]], next_cursor=next_cursor)
 
     async def create_author(self, author: AuthorCreate) -> AuthorCreateResponse:
         # Create new author
@@ -40,12 +69,14 @@ class AuthorService:
         )
         
         self.db.add(new_author)
+        await self.db.flush()
+        record_change(self.db, "author", [new_author.id])
         await self.db.commit()
         await self.db.refresh(new_author)
         
         return await self.retrieve_author(new_author.id)
 
-    async def retrieve_author(self, author_id: int) -> AuthorResponse:
+    async def retrieve_author(self, author_id: int, include: Sequence[str] = ()) -> AuthorResponse:
         try:
             # Query author by ID
             result = await self.db.execute(select(Author).where(Author.id == author_id))
@@ -54,18 +85,18 @@ class AuthorService:
             if not author:
                 raise HTTPException(status_code=404, detail=f"Author with ID {author_id} not found")
             
-            # Get books by this author
-            books_result = await self.db.execute(select(Book).where(Book.author_id == author_id))
-            books = books_result.scalars().all()
-            
-            books_data = [
-                AuthorBooksSchema(
-                    id=book.id,
-                    title=book.title,
-                    isbn=book.isbn or "",
-                    publication_date=book.publication_date
-                ) for book in books
-            ]
+            # Get the first page of books by this author
+            books_page = await self._books_page(author_id, DEFAULT_PAGE_SIZE)
+
+            # Related resources requested with ?include=, loaded concurrently
+            included = None
+            if include:
+                loaders = {
+                    "categories": lambda db: IncludeService(db).categories(author_id=author_id),
+                    "rating_histogram": lambda db: IncludeService(db).rating_histogram(author_id=author_id)
+                }
+                included = AuthorIncluded(**await resolve_includes(
+                    self.db, {name: loader for name, loader in loaders.items() if name in include}))
             
             return AuthorResponse(
                 id=author.id,
@@ -75,7 +106,9 @@ class AuthorService:
                 death_date=author.death_date,
                 country=author.country,
                 book_count=author.book_count,
-                books=books_data,
+                books=books_page.results,
+                books_next_cursor=books_page.next_cursor,
+                included=included,
                 created_at=author.created_at,
                 updated_at=author.updated_at
             )
@@ -86,6 +119,55 @@ class AuthorService:
             print(f"Error retrieving author: {str(e)}")
             raise HTTPException(status_code=404, detail=f"Author with ID {author_id} not found")
 
+    async def retrieve_author_books(self, author_id: int, limit: int = DEFAULT_PAGE_SIZE,
+                                    cursor: Optional[str] = None) -> PageSchema[AuthorBooksSchema]:
+        books_page = await self._books_page(author_id, limit, cursor)
+        
+        if not books_page.results and not cursor:
+            result = await self.db.execute(select(Author.id).where(Author.id == author_id))
+            if result.scalar() is None:
+                raise HTTPException(status_code=404, detail=f"Author with ID {author_id} not found")
+        
+        return books_page
+
+    async def _books_page(self, author_id: int, limit: int, cursor: Optional[str] = None) -> PageSchema[AuthorBooksSchema]:
+        # Keyset page over ix_books_author_publication, reading only the listed columns
+        query = (
+            select(Book.id, Book.title, Book.isbn, Book.publication_date)
+            .where(Book.author_id == author_id)
+            .order_by(Book.publication_date.asc().nulls_last(), Book.id)
+            .limit(limit + 1)
+        )
+        if cursor:
+            after_date, after_id = decode_cursor(cursor, 2)
+            if after_date is None:
+                query = query.where(and_(Book.publication_date.is_(None), Book.id > after_id))
+            else:
+                try:
+                    after_date = date.fromisoformat(after_date)
+                except (TypeError, ValueError):
+                    raise HTTPException(status_code=400, detail="Invalid cursor")
+                query = query.where(or_(
+                    tuple_(Book.publication_date, Book.id) > tuple_(after_date, after_id),
+                    Book.publication_date.is_(None)
+                ))
+        
+        result = await self.db.execute(query)
+        books = result.all()
+        next_cursor = None
+        if len(books) > limit:
+            last = books[limit - 1]
+            next_cursor = encode_cursor(last.publication_date.isoformat() if last.publication_date else None, last.id)
+        
+        return PageSchema[AuthorBooksSchema](results=[
+            AuthorBooksSchema(
+                id=book.id,
+                title=book.title,
+                isbn=book.isbn or "",
+                publication_date=book.publication_date
+            ) for book in books[:limit]
+        ], next_cursor=next_cursor)
+
     async def update_author(self, author_id: int, author: AuthorUpdate) -> AuthorResponse:
         # Verify author exists
         result = await self.db.execute(select(Author).where(Author.id == author_id))
@@ -101,8 +183,10 @@ class AuthorService:
             setattr(existing_author, key, value)
         
         existing_author.updated_at = datetime.now(timezone.utc)
+        record_change(self.db, "author", [author_id])
         
         await self.db.commit()
         await self.db.refresh(existing_author)
+        invalidation_bus.publish("author", author_id)
         
         return await self.retrieve_author(author_id)
\ No newline at end of file
@@ -4,9 +4,19 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import func
 from sqlalchemy.orm import joinedload
+from typing import Optional, Sequence
 
-from store.models.db_model import Book, Author, Category, Review
-from store.models.book_model import BookCreate, BookUpdate, BookCreateResponse, BookUpdateResponse, BookResponse, BooksResponse
+from store.models.db_model import Book, Author, Category, Review, BookScore, CategoryBookScore
+from store.utils.facets import book_facets
+from store.utils.invalidation import invalidation_bus
+from store.utils.includes import resolve_includes
+from store.utils.change_log import record_change
+from store.utils.book_scores import recent_reviews, sync_category_scores
+from store.utils.pagination import DEFAULT_PAGE_SIZE, keyset_query, page_cursor
+from store.services.include_service import IncludeService
+from store.services.review_service import ReviewService
+from store.models.book_model import BookCreate, BookUpdate, BookCreateResponse, BookUpdateResponse, BookResponse, BooksResponse, BookIncluded, RankedBookSchema
+from store.models.base_model import PageSchema
 
 class BookService:
     def __init__(self, db: AsyncSession):
@@ -42,7 +52,7 @@ class BookService:
             if avg_rating:
                 avg_rating = round(avg_rating * 1.0, 1)
             
-            book_response = BookResponse(
+            book_response = BooksResponse(
                 id=book.id,
                 title=book.title,
                 isbn=book.isbn or "",
@@ -60,6 +70,45 @@ class BookService:
             
         return result_books
 
+    async def retrieve_trending_books(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> PageSchema[RankedBookSchema]:
+        """Books by half-life weighted review volume; score is that weighted review count as of now"""
+        now = datetime.now(timezone.utc)
+        return await self._ranked_books(BookScore.trending_score, lambda value: round(recent_reviews(value, now), 2), limit, cursor)
+
+    async def retrieve_top_books(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                                 category_id: Optional[int] = None) -> PageSchema[RankedBookSchema]:
+        """Books by Bayesian average rating, optionally within one category"""
+        return await self._ranked_books(BookScore.bayesian_rating, lambda value: round(value, 2), limit, cursor, category_id)
+
+    async def _ranked_books(self, score_column, display, limit: int, cursor: Optional[str],
+                            category_id: Optional[int] = None) -> PageSchema[RankedBookSchema]:
+        ranking = BookScore
+        if category_id is not None:
+            # Walks ix_category_book_scores_bayesian within the category
+            ranking, score_column = CategoryBookScore, CategoryBookScore.bayesian_rating
+        query = select(ranking.book_id, score_column, BookScore.review_count,
+                       Book.title, Book.average_rating, Author.id.label("author_id"), Author.name.label("author_name")).select_from(ranking)
+        if category_id is not None:
+            query = (
+                query.join(BookScore, BookScore.book_id == CategoryBookScore.book_id)
+                .where(CategoryBookScore.category_id == category_id)
+            )
+        query = query.join(Book, Book.id == ranking.book_id).outerjoin(Author, Author.id == Book.author_id)
+        query = keyset_query(query, [score_column, ranking.book_id], cursor, limit, descending=True)
+        rows = (await self.db.execute(query)).all()
+
+        return PageSchema[RankedBookSchema](
+            results=[RankedBookSchema(
+                id=row.book_id,
+                title=row.title,
+                author={"id": row.author_id, "name": row.author_name} if row.author_id else {"id": 0, "name": "Unknown Author"},
+                average_rating=row.average_rating or 0,
+                review_count=row.review_count,
+                score=display(row[1])
+            ) for row in rows[:limit]],
+            next_cursor=page_cursor(rows, limit, [score_column.key, "book_id"])
+        )
+
     async def create_book(self, book: BookCreate) -> BookCreateResponse:
         
         existing = await self.db.execute(select(Book).where(Book.isbn == book.isbn))
@@ -127,6 +176,7 @@ class BookService:
 
         self.db.add(new_book)
         await self.db.flush()  
+        new_facets = book_facets(new_book)
 
         # Update book count for categories
         for category in found_categories:
@@ -136,12 +186,16 @@ class BookService:
         if author:
             author.book_count += 1
 
+        record_change(self.db, "book", [new_book.id])
+        record_change(self.db, "author", [new_facets["author_id"]])
+        record_change(self.db, "category", new_facets["category_ids"])
         await self.db.commit()
         await self.db.refresh(new_book)
+        invalidation_bus.publish("book", new_book.id, None, new_facets)
 
         return await self.retrieve_book(new_book.id)
 
-    async def retrieve_book(self, book_id: int) -> BookResponse:
+    async def retrieve_book(self, book_id: int, include: Sequence[str] = ()) -> BookResponse:
         try:
             # Query book by ID with author and categories
             result = await self.db.execute(
@@ -175,7 +229,7 @@ class BookService:
                 avg_rating = round(avg_rating * 1.0, 1)
                 print(avg_rating)
             
-            return BookResponse(
+            response = BookResponse(
                 id=book.id,
                 title=book.title,
                 isbn=book.isbn or "",
@@ -189,6 +243,19 @@ class BookService:
                 created_at=book.created_at,
                 updated_at=book.updated_at
             )
+
+            # Related resources requested with ?include=, loaded concurrently
+            if include:
+                loaders = {
+                    "author": lambda db: IncludeService(db).author(book.author_id),
+                    "categories": lambda db: IncludeService(db).categories([category.id for category in book.categories]),
+                    "reviews": lambda db: ReviewService(db).retrieve_reviews(book_id),
+                    "rating_histogram": lambda db: IncludeService(db).rating_histogram(book_id=book_id)
+                }
+                response.included = BookIncluded(**await resolve_includes(
+                    self.db, {name: loader for name, loader in loaders.items() if name in include}))
+
+            return response
         except Exception as e:
             if isinstance(e, HTTPException):
                 raise e
@@ -206,6 +273,8 @@ class BookService:
         if not existing_book:
             raise HTTPException(status_code=404, detail=f"Book with ID {book_id} not found")
         
+        old_facets = book_facets(existing_book)
+        
         if book.isbn:
             existing_isbn = await self.db.execute(
                 select(Book).where(Book.isbn == book.isbn, Book.id != book_id)
@@ -295,6 +364,7 @@ class BookService:
                 # Increment book count for new categories
                 if category.id not in current_category_ids:
                     category.book_count += 1
+            await sync_category_scores(self.db, book_id)
         
         # Update book fields
         for key, value in update_data.items():
@@ -302,8 +372,13 @@ class BookService:
                 setattr(existing_book, key, value)
         
         existing_book.updated_at = datetime.now(timezone.utc)
+        new_facets = book_facets(existing_book)
+        record_change(self.db, "book", [book_id])
+        record_change(self.db, "author", [old_facets["author_id"], new_facets["author_id"]])
+        record_change(self.db, "category", old_facets["category_ids"] + new_facets["category_ids"])
         
         await self.db.commit()
         await self.db.refresh(existing_book)
+        invalidation_bus.publish("book", book_id, old_facets, new_facets)
         
         return await self.retrieve_book(book_id)
\ No newline at end of file
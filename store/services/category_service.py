@@ -1,30 +1,51 @@
 from fastapi import HTTPException
+from typing import Optional
 from datetime import datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import update, func, desc, and_
+from sqlalchemy import update, and_
 
 from store.models.category_model import CategoryCreate, CategoryUpdate, CategoryCreateResponse
 from store.models.category_model import CategoryUpdateResponse, CategoryResponse, CategorysResponse, TopBooksSchema
-from store.models.db_model import Category, Book, Author, book_category, Review
+from store.models.db_model import Author, Book, Category, CategoryBookScore
+from store.models.base_model import PageSchema
+from store.utils.pagination import DEFAULT_PAGE_SIZE, keyset_query, page_cursor, prefix_range
+from store.utils.invalidation import invalidation_bus
+from store.utils.change_log import record_change
+
+# Books listed on the category page
+CATEGORY_TOP_BOOKS = 5
 
 class CategoryService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def retrieve_categories(self) -> list[CategorysResponse]:
-        # Query all categories
-        result = await self.db.execute(select(Category))
+    async def retrieve_categories(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                                  name_prefix: Optional[str] = None, sort: str = "id") -> PageSchema[CategorysResponse]:
+        query = select(Category)
+        if name_prefix:
+            query = query.where(*prefix_range(Category.name, name_prefix))
+        
+        # Largest first for book_count, otherwise ascending id
+        if sort == "book_count":
+            query = keyset_query(query, [Category.book_count, Category.id], cursor, limit, descending=True)
+            cursor_keys = ["book_count", "id"]
+        else:
+            query = keyset_query(query, [Category.id], cursor, limit)
+            cursor_keys = ["id"]
+        
+        result = await self.db.execute(query)
         categories = result.scalars().all()
+        next_cursor = page_cursor(categories, limit, cursor_keys)
         
-        return [CategorysResponse(
+        return PageSchema[CategorysResponse](results=[CategorysResponse(
             id=category.id,
             name=category.name,
             description=category.description,
             book_count=category.book_count,
             created_at=category.created_at,
             updated_at=category.updated_at
-        ) for category in categories]
+        ) for category in categories[:limit]], next_cursor=next_cursor)
     
     async def create_category(self, category: CategoryCreate) -> CategoryCreateResponse:
        
@@ -41,6 +62,8 @@ class CategoryService:
         )
         
         self.db.add(new_category)
+        await self.db.flush()
+        record_change(self.db, "category", [new_category.id])
         await self.db.commit()
         await self.db.refresh(new_category)
         
@@ -48,48 +71,32 @@ class CategoryService:
     
     async def retrieve_category(self, category_id: int) -> CategoryResponse:
         try:
-            # Get the category
             result = await self.db.execute(select(Category).where(Category.id == category_id))
             category = result.scalars().first()
-            
+
             if not category:
                 raise HTTPException(status_code=404, detail="Category not found")
-            
-            # First, get books in this category with average ratings
-            top_books_query = (
-                select(Book.id, Book.title, Book.author_id, func.avg(Review.rating).label("avg_rating"))
-                .join(book_category, Book.id == book_category.c.book_id)
-                .join(Category, book_category.c.category_id == Category.id)
-                .outerjoin(Review, Book.id == Review.book_id)
-                .where(Category.id == category_id)
-                .group_by(Book.id)
-                .order_by(desc("avg_rating"))
-                .limit(5)
+
+            # Same ranking as /books/top?category_id=, read from the head of its index
+            result = await self.db.execute(
+                select(CategoryBookScore.book_id, Book.title, Book.average_rating,
+                       Author.id.label("author_id"), Author.name.label("author_name"))
+                .join(Book, Book.id == CategoryBookScore.book_id)
+                .outerjoin(Author, Author.id == Book.author_id)
+                .where(CategoryBookScore.category_id == category_id)
+                .order_by(CategoryBookScore.bayesian_rating.desc(), CategoryBookScore.book_id.desc())
+                .limit(CATEGORY_TOP_BOOKS)
             )
-            
-            top_books_result = await self.db.execute(top_books_query)
-            top_books_data = []
-            
-            # Get book details with authors
-            for book_id, book_title, author_id, avg_rating in top_books_result:
-                # Get author information if available
-                author_data = None
-                if author_id:
-                    author_query = select(Author).where(Author.id == author_id)
-                    author_result = await self.db.execute(author_query)
-                    author = author_result.scalars().first()
-                    if author:
-                        author_data = {"id": author.id, "name": author.name}
-                
-                top_books_data.append(
-                    TopBooksSchema(
-                        id=book_id,
-                        title=book_title,
-                        author=author_data,
-                        average_rating=round(avg_rating, 1) if avg_rating else 0
-                    )
+            top_books_data = [
+                TopBooksSchema(
+                    id=row.book_id,
+                    title=row.title,
+                    author={"id": row.author_id, "name": row.author_name} if row.author_id else None,
+                    average_rating=row.average_rating or 0
                 )
-            
+                for row in result
+            ]
+
             return CategoryResponse(
                 id=category.id,
                 name=category.name,
@@ -138,8 +145,10 @@ class CategoryService:
                 .where(Category.id == category_id)
                 .values(**update_data)
             )
+            record_change(self.db, "category", [category_id])
             
             await self.db.commit()
+            invalidation_bus.publish("category", category_id)
             
             return await self.retrieve_category(category_id)
             
@@ -0,0 +1,53 @@
+from typing import Optional, Sequence
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import func
+
+from store.models.db_model import ChangeLog
+from store.models.change_model import ChangeSchema, ChangesResponse
+from store.services.include_service import IncludeService
+from store.utils.metrics import CHANGE_FEED_LAG
+from store.utils.pagination import DEFAULT_PAGE_SIZE, encode_cursor, keyset_query
+
+class ChangeService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def retrieve_changes(self, since: Optional[str], types: Sequence[str], limit: int = DEFAULT_PAGE_SIZE) -> ChangesResponse:
+        # Entries of transactions older than the oldest one still running can no longer appear
+        # behind the cursor, so the feed never reads past that horizon. Any long transaction
+        # holding an xid, even one that never writes the log, holds the feed back until it ends
+        snapshot = func.txid_current_snapshot()
+        horizon, next_txid = (await self.db.execute(
+            select(func.txid_snapshot_xmin(snapshot), func.txid_snapshot_xmax(snapshot))
+        )).one()
+        CHANGE_FEED_LAG.set(next_txid - horizon)
+        query = select(ChangeLog).where(ChangeLog.txid < horizon, ChangeLog.entity_type.in_(types))
+        query = keyset_query(query, [ChangeLog.txid, ChangeLog.id], since, limit)
+        entries = (await self.db.execute(query)).scalars().all()
+        page = entries[:limit]
+
+        # An entity changed several times in the page is reported once, at its latest change
+        latest = {}
+        for entry in page:
+            latest.pop((entry.entity_type, entry.entity_id), None)
+            latest[(entry.entity_type, entry.entity_id)] = entry.changed_at
+
+        loaders = {
+            "book": IncludeService(self.db).books,
+            "author": IncludeService(self.db).authors,
+            "category": IncludeService(self.db).categories,
+            "review": IncludeService(self.db).reviews,
+        }
+        data = {}
+        for entity_type, load in loaders.items():
+            ids = [entity_id for kind, entity_id in latest if kind == entity_type]
+            if ids:
+                data.update({(entity_type, entity.id): entity for entity in await load(ids)})
+
+        return ChangesResponse(
+            results=[ChangeSchema(type=entity_type, id=entity_id, changed_at=changed_at, data=data.get((entity_type, entity_id)))
+                     for (entity_type, entity_id), changed_at in latest.items()],
+            next_cursor=encode_cursor(page[-1].txid, page[-1].id) if page else since or encode_cursor(0, 0),
+            has_more=len(entries) > limit
+        )
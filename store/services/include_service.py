@@ -0,0 +1,114 @@
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload, selectinload
+
+from store.models.db_model import Author, Book, Category, Review, book_category
+from store.models.author_model import AuthorsResponse
+from store.models.category_model import CategorysResponse
+from store.models.book_model import BooksResponse
+from store.models.review_model import ReviewsResponse
+
+class IncludeService:
+    """Batched lookups of the related resources embedded by ?include="""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def author(self, author_id: Optional[int]) -> Optional[AuthorsResponse]:
+        if author_id is None:
+            return None
+        authors = await self.authors([author_id])
+        return authors[0] if authors else None
+
+    async def authors(self, author_ids: list[int]) -> list[AuthorsResponse]:
+        if not author_ids:
+            return []
+        result = await self.db.execute(select(Author).where(Author.id.in_(author_ids)).order_by(Author.id))
+        return [AuthorsResponse(
+            id=author.id,
+            name=author.name,
+            biography=author.biography,
+            birth_date=author.birth_date,
+            death_date=author.death_date,
+            country=author.country,
+            book_count=author.book_count,
+            created_at=author.created_at,
+            updated_at=author.updated_at
+        ) for author in result.scalars().all()]
+
+    async def categories(self, category_ids: Optional[list[int]] = None, author_id: Optional[int] = None) -> list[CategorysResponse]:
+        """Categories by id, or every category holding a book by the author, in one query"""
+        query = select(Category).order_by(Category.id)
+        if author_id is not None:
+            query = query.where(Category.id.in_(
+                select(book_category.c.category_id)
+                .join(Book, Book.id == book_category.c.book_id)
+                .where(Book.author_id == author_id)
+            ))
+        else:
+            if not category_ids:
+                return []
+            query = query.where(Category.id.in_(category_ids))
+        result = await self.db.execute(query)
+        return [CategorysResponse(
+            id=category.id,
+            name=category.name,
+            description=category.description,
+            book_count=category.book_count,
+            created_at=category.created_at,
+            updated_at=category.updated_at
+        ) for category in result.scalars().all()]
+
+    async def books(self, book_ids: list[int]) -> list[BooksResponse]:
+        if not book_ids:
+            return []
+        result = await self.db.execute(
+            select(Book)
+            .options(joinedload(Book.author), selectinload(Book.categories))
+            .where(Book.id.in_(book_ids))
+            .order_by(Book.id)
+        )
+        return [BooksResponse(
+            id=book.id,
+            title=book.title,
+            isbn=book.isbn or "",
+            publication_date=book.publication_date,
+            description=book.description,
+            page_count=book.page_count,
+            language=book.language,
+            author={"id": book.author.id, "name": book.author.name} if book.author else {"id": 0, "name": "Unknown Author"},
+            categories=[{"id": category.id, "name": category.name} for category in book.categories],
+            average_rating=book.average_rating or 0,
+            created_at=book.created_at,
+            updated_at=book.updated_at
+        ) for book in result.scalars().all()]
+
+    async def reviews(self, review_ids: list[int]) -> list[ReviewsResponse]:
+        if not review_ids:
+            return []
+        result = await self.db.execute(
+            select(Review).options(joinedload(Review.user)).where(Review.id.in_(review_ids)).order_by(Review.id)
+        )
+        return [ReviewsResponse(
+            id=review.id,
+            book_id=review.book_id,
+            user={"id": review.user.id, "username": review.user.username} if review.user else {"id": review.user_id, "username": "Unknown user"},
+            rating=review.rating,
+            title=review.title,
+            content=review.content,
+            created_at=review.created_at,
+            updated_at=review.updated_at
+        ) for review in result.scalars().all()]
+
+    async def rating_histogram(self, book_id: Optional[int] = None, author_id: Optional[int] = None) -> dict[str, int]:
+        """Number of reviews per whole star, for one book or for every book by an author"""
+        stars = func.floor(Review.rating).label("stars")
+        query = select(stars, func.count()).group_by(stars).order_by(stars)
+        if author_id is not None:
+            query = query.join(Book, Book.id == Review.book_id).where(Book.author_id == author_id)
+        else:
+            query = query.where(Review.book_id == book_id)
+        result = await self.db.execute(query)
+        return {str(int(star)): count for star, count in result.all() if star is not None}
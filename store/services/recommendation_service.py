@@ -0,0 +1,86 @@
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import text
+
+from store.models.db_model import Author, Book, book_category
+from store.utils.content_similarity import content_similarity
+from store.models.book_model import SimilarBookSchema, SimilarBooksResponse
+
+# The book and its precomputed neighbors in one primary key read of book_similarities
+SIMILAR_BOOKS = text("""
+    SELECT neighbor.book_id, b.title, b.average_rating, a.id AS author_id, a.name AS author_name, neighbor.score
+    FROM books book
+    LEFT JOIN book_similarities bs ON bs.book_id = book.id
+    LEFT JOIN LATERAL unnest(bs.similar_book_ids, bs.scores) WITH ORDINALITY AS neighbor(book_id, score, position) ON true
+    LEFT JOIN books b ON b.id = neighbor.book_id
+    LEFT JOIN authors a ON a.id = b.author_id
+    WHERE book.id = :book_id
+    ORDER BY neighbor.position
+    LIMIT :limit
+""")
+
+class RecommendationService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def similar_books(self, book_id: int, limit: int, source: str = "auto") -> SimilarBooksResponse:
+        """Books liked by the same readers, or for source=auto books without co-ratings, books sharing its categories and author"""
+        if source == "content":
+            return await self.content_similar_books(book_id, limit)
+
+        rows = (await self.db.execute(SIMILAR_BOOKS, {"book_id": book_id, "limit": limit})).all()
+        if not rows:
+            raise HTTPException(status_code=404, detail="Book not found")
+
+        results = []
+        for similar_book_id, title, average_rating, author_id, author_name, score in rows:
+            # No neighbors yet, or a neighbor removed since the last build
+            if title is None:
+                continue
+            results.append(SimilarBookSchema(
+                id=similar_book_id,
+                title=title,
+                author={"id": author_id, "name": author_name} if author_id else {"id": 0, "name": "Unknown Author"},
+                average_rating=average_rating or 0,
+                score=score
+            ))
+        if not results and source == "auto":
+            return await self.content_similar_books(book_id, limit)
+        return SimilarBooksResponse(book_id=book_id, source="ratings", results=results)
+
+    async def content_similar_books(self, book_id: int, limit: int) -> SimilarBooksResponse:
+        if not content_similarity.ready:
+            raise HTTPException(status_code=503, detail="Content similarity is not available")
+
+        result = await self.db.execute(
+            select(Book.author_id, book_category.c.category_id)
+            .outerjoin(book_category, book_category.c.book_id == Book.id)
+            .where(Book.id == book_id)
+        )
+        rows = result.all()
+        if not rows:
+            raise HTTPException(status_code=404, detail="Book not found")
+
+        neighbors = content_similarity.similar(book_id, rows[0][0], [category_id for _, category_id in rows if category_id], limit)
+        result = await self.db.execute(
+            select(Book.id, Book.title, Book.average_rating, Author.id, Author.name)
+            .outerjoin(Author, Author.id == Book.author_id)
+            .where(Book.id.in_([similar_book_id for similar_book_id, _ in neighbors]))
+        )
+        books = {row[0]: row for row in result.all()}
+
+        results = []
+        for similar_book_id, score in neighbors:
+            # Books no longer in the catalog
+            if similar_book_id not in books:
+                continue
+            _, title, average_rating, author_id, author_name = books[similar_book_id]
+            results.append(SimilarBookSchema(
+                id=similar_book_id,
+                title=title,
+                author={"id": author_id, "name": author_name} if author_id else {"id": 0, "name": "Unknown Author"},
+                average_rating=average_rating or 0,
+                score=score
+            ))
+        return SimilarBooksResponse(book_id=book_id, source="content", results=results)
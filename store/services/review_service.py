@@ -7,6 +7,10 @@ from sqlalchemy.orm import joinedload
 
 from store.models.review_model import ReviewCreate, ReviewUpdate, ReviewCreateResponse, ReviewUpdateResponse, ReviewResponse, ReviewsResponse
 from store.models.db_model import Review, Book, User
+from store.utils.invalidation import invalidation_bus
+from store.utils.counters import RECENT_REVIEWS_LIMIT
+from store.utils.change_log import record_change
+from store.utils.book_scores import record_review, change_rating
 
 class ReviewService:
     def __init__(self, db: AsyncSession):
@@ -92,6 +96,9 @@ class ReviewService:
             )
             
             self.db.add(new_review)
+            await self.db.flush()
+            record_change(self.db, "review", [new_review.id])
+            await record_review(self.db, book_id, new_review.rating, new_review.created_at)
             await self.db.commit()
             await self.db.refresh(new_review)
             
@@ -106,19 +113,12 @@ class ReviewService:
                     "title": book.title
                 },
                 "rating": new_review.rating,
-                "created_at": new_review.created_at
+                "created_at": new_review.created_at.isoformat()
             }
             
-            # Initialize recent_reviews if it doesn't exist
-            if user.recent_reviews is None:
-                user.recent_reviews = []
-            
-            # Add new review to the beginning of recent_reviews
-            user.recent_reviews.insert(0, new_recent_review)
-            
-            # Keep only the 5 most recent reviews
-            if len(user.recent_reviews) > 5:
-                user.recent_reviews = user.recent_reviews[:5]
+            # Prepend to recent_reviews, keeping only the most recent ones. A new list is
+            # assigned because in-place changes to the array are not detected on flush.
+            user.recent_reviews = [new_recent_review, *(user.recent_reviews or [])][:RECENT_REVIEWS_LIMIT]
             
             # Update book's average rating
             avg_rating_result = await self.db.execute(
@@ -128,8 +128,10 @@ class ReviewService:
             
             if avg_rating:
                 book.average_rating = round(avg_rating * 1.0, 1)
+                record_change(self.db, "book", [book_id])
                 
             await self.db.commit()
+            invalidation_bus.publish("review", book_id, new_review.id)
             
             # Get complete review with user information
             result = await self.db.execute(
@@ -237,6 +239,7 @@ class ReviewService:
             
             # Update timestamp
             update_data["updated_at"] = datetime.now(timezone.utc)
+            old_rating = review.rating
             
             # Update review
             await self.db.execute(
@@ -244,8 +247,12 @@ class ReviewService:
                 .where(Review.id == review_id)
                 .values(**update_data)
             )
+            record_change(self.db, "review", [review_id])
+            if "rating" in update_data:
+                await change_rating(self.db, book_id, old_rating, update_data["rating"])
             
             await self.db.commit()
+            invalidation_bus.publish("review", book_id, review_id)
             
             # Get updated review with book and user information
             updated_review_result = await self.db.execute(
@@ -267,17 +274,18 @@ class ReviewService:
                     book = book_result.scalars().first()
                     
                     if book:
-                        book.average_rating = avg_rating
+                        book.average_rating = round(avg_rating * 1.0, 1)
+                        record_change(self.db, "book", [book_id])
                 
                 # Update user's recent reviews if this review is in the list
                 user_result = await self.db.execute(select(User).where(User.id == user_id))
                 user = user_result.scalars().first()
                 
                 if user and user.recent_reviews:
-                    for i, recent_review in enumerate(user.recent_reviews):
-                        if recent_review.get("id") == review_id:
-                            user.recent_reviews[i]["rating"] = update_data["rating"]
-                            break
+                    user.recent_reviews = [
+                        {**recent_review, "rating": update_data["rating"]} if recent_review.get("id") == review_id else recent_review
+                        for recent_review in user.recent_reviews
+                    ]
                 
                 await self.db.commit()
             
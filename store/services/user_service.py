@@ -1,11 +1,15 @@
 from fastapi import HTTPException
+from typing import Optional
 from datetime import datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import update, and_, or_
 from sqlalchemy.orm import joinedload
 
-from store.utils.util import get_hashed_password
+from store.utils.util import hash_password
+from store.utils.invalidation import invalidation_bus
+from store.utils.pagination import DEFAULT_PAGE_SIZE, keyset_query, page_cursor, prefix_range
+from store.models.base_model import PageSchema
 from store.models.user_model import UserCreate, UserUpdate, UserCreateResponse, UserUpdateResponse, UserResponse, UsersResponse
 from store.models.db_model import User, Review, Book
 
@@ -13,12 +17,22 @@ class UserService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def retrieve_users(self) -> list[UsersResponse]:
-        # Query all users
-        result = await self.db.execute(select(User))
-        users = result.scalars().all()
+    async def retrieve_users(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                             username_prefix: Optional[str] = None) -> PageSchema[UsersResponse]:
+        # Select only the listed columns; password and recent_reviews are never loaded
+        query = keyset_query(
+            select(User.id, User.username, User.email, User.first_name, User.last_name,
+                   User.review_count, User.created_at, User.updated_at),
+            [User.id], cursor, limit
+        )
+        if username_prefix:
+            query = query.where(*prefix_range(User.username, username_prefix))
+
+        result = await self.db.execute(query)
+        users = result.all()
+        next_cursor = page_cursor(users, limit, ["id"])
         
-        return [UsersResponse(
+        return PageSchema[UsersResponse](results=[UsersResponse(
             id=user.id,
             username=user.username,
             email=user.email,
@@ -27,7 +41,7 @@ class UserService:
             created_at=user.created_at,
             updated_at=user.updated_at,
             review_count=user.review_count or 0
-        ) for user in users]
+        ) for user in users[:limit]], next_cursor=next_cursor)
 
     async def create_user(self, user_create: UserCreate) -> UserCreateResponse:
         # Check if username or email already exists
@@ -49,7 +63,7 @@ class UserService:
         
         # Hash the password
         user_dict = user_create.model_dump()
-        user_dict["password"] = get_hashed_password(user_dict["password"])
+        user_dict["password"] = await hash_password(user_dict["password"])
         
         # Create new user
         new_user = User(
@@ -64,6 +78,7 @@ class UserService:
         self.db.add(new_user)
         await self.db.commit()
         await self.db.refresh(new_user)
+        invalidation_bus.publish("user", new_user.id)
         
         return await self.retrieve_user(new_user.id)
 
@@ -162,6 +177,7 @@ class UserService:
             )
             
             await self.db.commit()
+            invalidation_bus.publish("user", user_id)
             
             # Return updated user
             return await self.retrieve_user(user_id)
@@ -0,0 +1,160 @@
+"""Builder of the "readers also liked" item-item similarities behind GET /books/{id}/similar.
+
+    python -m store.similarity --neighbors 50 --batch 2000
+
+Every review is loaded into a sparse book x reader matrix of ratings centred
+on each reader's mean, so a score reflects shared taste rather than how
+generous the readers are. Rows are normalised, and the cosine similarities of
+a batch of books against all books come out of one sparse product. The top
+neighbors of every book in the batch are then picked with a single sort over
+the product's entries. Results are upserted into book_similarities batch by
+batch, so readers keep the previous lists until a book's new list is written.
+
+Needs numpy and scipy. Run it from cron, or set SIMILARITY_REBUILD_INTERVAL
+to rebuild from the application's scheduler.
+"""
+import os
+import time
+import asyncio
+import logging
+import argparse
+from array import array
+from datetime import datetime, timezone
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+
+from store.database import engine, init_db
+from store.models.db_model import BookSimilarity
+
+# Neighbors kept per book
+SIMILARITY_NEIGHBORS = int(os.environ.get('SIMILARITY_NEIGHBORS', 50))
+# Books multiplied against the whole matrix at a time; bounds the memory of one product
+SIMILARITY_BATCH = int(os.environ.get('SIMILARITY_BATCH', 2000))
+SIMILARITY_MIN_SCORE = float(os.environ.get('SIMILARITY_MIN_SCORE', 0.01))
+# Seconds between rebuilds by the scheduler; 0 leaves rebuilding to the command line
+SIMILARITY_REBUILD_INTERVAL = float(os.environ.get('SIMILARITY_REBUILD_INTERVAL', 0))
+
+RATINGS_CHUNK = 100000
+WRITE_CHUNK = 1000
+
+logger = logging.getLogger(__name__)
+
+async def load_ratings() -> tuple[array, array, array]:
+    """Stream every (reader, book, rating) triple into typed arrays"""
+    users, books, ratings = array('i'), array('i'), array('d')
+    async with engine.connect() as conn:
+        result = await conn.stream(text(
+            "SELECT user_id, book_id, rating FROM reviews WHERE user_id IS NOT NULL AND book_id IS NOT NULL"
+        ))
+        async for partition in result.partitions(RATINGS_CHUNK):
+            users.extend(row[0] for row in partition)
+            books.extend(row[1] for row in partition)
+            ratings.extend(row[2] for row in partition)
+    return users, books, ratings
+
+class RatingMatrix:
+    """Row-normalised, reader-centred sparse ratings with book ids as row numbers"""
+
+    def __init__(self, users: array, books: array, ratings: array):
+        import numpy as np
+        from scipy import sparse
+
+        self.np = np
+        users = np.frombuffer(users, dtype=np.int32)
+        books = np.frombuffer(books, dtype=np.int32)
+        ratings = np.frombuffer(ratings, dtype=np.float64)
+        if not len(ratings):
+            self.books = np.empty(0, dtype=np.int64)
+            return
+
+        readers, users = np.unique(users, return_inverse=True)
+        counts = np.bincount(users)
+        values = ratings - (np.bincount(users, weights=ratings) / counts)[users]
+        # A reader with one review, or the same rating everywhere, links no books
+        keep = (counts[users] > 1) & (values != 0)
+        matrix = sparse.csr_matrix((values[keep], (books[keep], users[keep])),
+                                   shape=(int(books.max()) + 1, len(readers)))
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        self.matrix = sparse.csr_matrix(sparse.diags(1 / norms) @ matrix)
+        self.transposed = self.matrix.T.tocsr()
+        # Books with at least one centred rating, i.e. rows that can have neighbors
+        self.books = np.flatnonzero(np.diff(self.matrix.indptr))
+
+    def neighbors(self, books, neighbors: int, min_score: float) -> list[tuple[int, list[int], list[float]]]:
+        """Top neighbors of each of books, as (book_id, similar_book_ids, scores) best first"""
+        np = self.np
+        product = (self.matrix[books] @ self.transposed).tocoo()
+        rows, columns, scores = product.row, product.col, product.data
+        keep = (columns != books[rows]) & (scores >= min_score)
+        rows, columns, scores = rows[keep], columns[keep], scores[keep]
+
+        # Order by book, then best score first, and keep the first entries of every book
+        order = np.lexsort((columns, -scores, rows))
+        rows, columns, scores = rows[order], columns[order], scores[order]
+        position = np.arange(len(rows)) - np.searchsorted(rows, rows)
+        top = position < neighbors
+        rows, columns, scores = rows[top], columns[top], scores[top].round(4)
+
+        bounds = np.flatnonzero(np.diff(rows)) + 1
+        return [(int(books[book_rows[0]]), book_columns.tolist(), book_scores.tolist())
+                for book_rows, book_columns, book_scores
+                in zip(np.split(rows, bounds), np.split(columns, bounds), np.split(scores, bounds))
+                if len(book_rows)]
+
+async def store_neighbors(rows: list[tuple[int, list[int], list[float]]], computed_at: datetime):
+    for start in range(0, len(rows), WRITE_CHUNK):
+        statement = insert(BookSimilarity).values([
+            {"book_id": book_id, "similar_book_ids": similar_book_ids, "scores": scores, "computed_at": computed_at}
+            for book_id, similar_book_ids, scores in rows[start:start + WRITE_CHUNK]
+        ])
+        statement = statement.on_conflict_do_update(
+            index_elements=[BookSimilarity.book_id],
+            set_={
+                "similar_book_ids": statement.excluded.similar_book_ids,
+                "scores": statement.excluded.scores,
+                "computed_at": statement.excluded.computed_at,
+            }
+        )
+        async with engine.begin() as conn:
+            await conn.execute(statement)
+
+async def build_similarities(neighbors: int = SIMILARITY_NEIGHBORS, batch_size: int = SIMILARITY_BATCH,
+                             min_score: float = SIMILARITY_MIN_SCORE) -> int:
+    """Recompute the neighbors of every rated book and return the number of books stored"""
+    started = time.perf_counter()
+    computed_at = datetime.now(timezone.utc)
+    ratings = await load_ratings()
+    # The matrix work runs in a thread so a scheduled rebuild does not stall the event loop
+    matrix = await asyncio.to_thread(RatingMatrix, *ratings)
+    stored = 0
+    for start in range(0, len(matrix.books), batch_size):
+        rows = await asyncio.to_thread(matrix.neighbors, matrix.books[start:start + batch_size], neighbors, min_score)
+        await store_neighbors(rows, computed_at)
+        stored += len(rows)
+
+    # Books that no longer have any neighbor keep no stale list
+    async with engine.begin() as conn:
+        await conn.execute(BookSimilarity.__table__.delete().where(BookSimilarity.computed_at < computed_at))
+    logger.info("Stored similar books for %d books in %.1fs", stored, time.perf_counter() - started)
+    return stored
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0], formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog=__doc__.split('\n', 1)[1])
+    parser.add_argument('--neighbors', type=int, default=SIMILARITY_NEIGHBORS)
+    parser.add_argument('--batch', type=int, default=SIMILARITY_BATCH)
+    parser.add_argument('--min-score', type=float, default=SIMILARITY_MIN_SCORE)
+    args = parser.parse_args()
+
+    async def run():
+        try:
+            await init_db()
+            return await build_similarities(args.neighbors, args.batch, args.min_score)
+        finally:
+            await engine.dispose()
+
+    print(f"Stored similar books for {asyncio.run(run())} books")
+
+if __name__ == '__main__':
+    main()
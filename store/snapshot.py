@@ -0,0 +1,243 @@
+"""Columnar snapshot export of the catalog for offline analytics.
+
+    python -m store.snapshot /data/snapshots/2025-03-01 --database-url postgresql+asyncpg://replica/book_store
+
+books, authors, categories, reviews and book_category are streamed from one
+read-only REPEATABLE READ transaction, so the files describe a single
+consistent state, and written chunk by chunk as typed column files:
+
+    <table>/<column>.data       little-endian values, one per row
+    <table>/<column>.offsets    int64 start of each row's UTF-8 bytes, plus the end (strings only)
+    <table>/<column>.nulls      uint8, 1 where the value is NULL (nullable columns only)
+    <table>/<key>.keys          distinct values of the table's first sort column
+    <table>/<key>.rows          int64 first row of each key, plus the row count
+    manifest.json               row counts, sort order, column types and file names
+
+Every "dtype" in the manifest is a numpy dtype string, so a column maps
+straight into memory, e.g. numpy.memmap(path, dtype="<f8", mode="r").
+Dates and timestamps are datetime64 day and microsecond counts; NULL numbers
+and dates also read as NaN and NaT. Free-text columns are left out unless
+--text is given, and users are never exported.
+"""
+import os
+import sys
+import json
+import shutil
+import asyncio
+import argparse
+from array import array
+from datetime import date, datetime, timezone
+from sqlalchemy import BigInteger, Date, DateTime, Float, Integer, String, Text, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from store.database import DATABASE_URL
+from store.models.db_model import Author, Book, Category, Review, book_category
+
+SNAPSHOT_FORMAT = "book-store-snapshot"
+SNAPSHOT_VERSION = 1
+
+# Rows fetched from the server-side cursor and appended to the files at a time
+SNAPSHOT_CHUNK = int(os.environ.get('SNAPSHOT_CHUNK', 50000))
+
+EPOCH_DATE = date(1970, 1, 1)
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+NAT = -2 ** 63
+
+# table name -> (table, sort columns); the first sort column is indexed when it is not unique
+SNAPSHOT_TABLES = {
+    "books": (Book.__table__, ["id"]),
+    "authors": (Author.__table__, ["id"]),
+    "categories": (Category.__table__, ["id"]),
+    # Same order as ix_reviews_book_created, so the server can stream it without sorting
+    "reviews": (Review.__table__, ["book_id", "created_at"]),
+    "book_category": (book_category, ["book_id", "category_id"]),
+}
+
+def _days(value: date) -> int:
+    return (value - EPOCH_DATE).days
+
+def _microseconds(value: datetime) -> int:
+    delta = value - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+# column type -> (array typecode, numpy dtype, value encoder, value written for NULL)
+ENCODINGS = {
+    "int32": ('i', "<i4", int, 0),
+    "int64": ('q', "<i8", int, 0),
+    "float64": ('d', "<f8", float, float('nan')),
+    "date": ('q', "<M8[D]", _days, NAT),
+    "timestamp": ('q', "<M8[us]", _microseconds, NAT),
+}
+
+def column_type(column) -> str:
+    if isinstance(column.type, BigInteger):
+        return "int64"
+    if isinstance(column.type, Integer):
+        return "int32"
+    if isinstance(column.type, Float):
+        return "float64"
+    if isinstance(column.type, DateTime):
+        return "timestamp"
+    if isinstance(column.type, Date):
+        return "date"
+    if isinstance(column.type, (String, Text)):
+        return "utf8"
+    raise ValueError(f"Column {column} has no snapshot encoding")
+
+def exported_columns(table, text_columns: bool) -> list:
+    return [column for column in table.columns if text_columns or not isinstance(column.type, Text)]
+
+def _write(path: str, values: array):
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    with open(path, 'ab') as f:
+        values.tofile(f)
+
+class ColumnWriter:
+    """Appends one column of a table, chunk by chunk, to its typed column files"""
+
+    def __init__(self, directory: str, column):
+        self.name = column.name
+        self.type = column_type(column)
+        self.nullable = column.nullable and not column.primary_key
+        self.path = os.path.join(directory, column.name)
+        self.files = {"data": f"{self.path}.data"}
+        if self.type == "utf8":
+            self.files["offsets"] = f"{self.path}.offsets"
+            self.size = 0
+            _write(self.files["offsets"], array('q', [0]))
+        if self.nullable:
+            self.files["nulls"] = f"{self.path}.nulls"
+        for path in self.files.values():
+            open(path, 'ab').close()
+
+    def append(self, values: list):
+        if self.nullable:
+            _write(self.files["nulls"], array('B', [value is None for value in values]))
+        if self.type == "utf8":
+            encoded = [value.encode() if value is not None else b"" for value in values]
+            offsets = array('q')
+            for value in encoded:
+                self.size += len(value)
+                offsets.append(self.size)
+            with open(self.files["data"], 'ab') as f:
+                f.write(b"".join(encoded))
+            _write(self.files["offsets"], offsets)
+        else:
+            typecode, _, encode, null = ENCODINGS[self.type]
+            _write(self.files["data"], array(typecode, [encode(value) if value is not None else null for value in values]))
+
+    def describe(self, root: str) -> dict:
+        dtype = "utf8" if self.type == "utf8" else ENCODINGS[self.type][1]
+        return {"type": self.type, "dtype": dtype, "nullable": self.nullable,
+                **{kind: os.path.relpath(path, root) for kind, path in self.files.items()}}
+
+class KeyIndex:
+    """Run-length index of a sorted column: each distinct key and the first row holding it"""
+
+    def __init__(self, directory: str, column):
+        self.name = column.name
+        self.files = {"keys": os.path.join(directory, f"{column.name}.keys"),
+                      "rows": os.path.join(directory, f"{column.name}.rows")}
+        self.last = None
+        self.count = 0
+        for path in self.files.values():
+            open(path, 'ab').close()
+
+    def append(self, values: list):
+        keys, rows = array('q'), array('q')
+        for value in values:
+            if value != self.last:
+                # NULL keys sort last and are stored as 0 like other NULL integers
+                keys.append(value if value is not None else 0)
+                rows.append(self.count)
+                self.last = value
+            self.count += 1
+        _write(self.files["keys"], keys)
+        _write(self.files["rows"], rows)
+
+    def close(self):
+        _write(self.files["rows"], array('q', [self.count]))
+
+    def describe(self, root: str) -> dict:
+        return {"column": self.name, "dtype": "<i8", **{kind: os.path.relpath(path, root) for kind, path in self.files.items()}}
+
+async def export_table(conn, root: str, name: str, table, sort_columns: list[str], text_columns: bool, chunk_size: int) -> dict:
+    directory = os.path.join(root, name)
+    os.makedirs(directory)
+    columns = exported_columns(table, text_columns)
+    writers = [ColumnWriter(directory, column) for column in columns]
+    # A unique sort column is its own index; a repeated one gets a key -> rows index
+    key_column = table.columns[sort_columns[0]]
+    index = None if key_column.primary_key else KeyIndex(directory, key_column)
+
+    query = select(*columns).order_by(*[table.columns[column] for column in sort_columns])
+    result = await conn.stream(query.execution_options(yield_per=chunk_size))
+    rows = 0
+    async for partition in result.partitions():
+        for position, writer in enumerate(writers):
+            writer.append([row[position] for row in partition])
+        if index is not None:
+            index.append([getattr(row, key_column.name) for row in partition])
+        rows += len(partition)
+    if index is not None:
+        index.close()
+
+    return {
+        "rows": rows,
+        "sorted_by": sort_columns,
+        "columns": {writer.name: writer.describe(root) for writer in writers},
+        "index": index.describe(root) if index is not None else None,
+    }
+
+async def export_snapshot(output: str, database_url: str = DATABASE_URL, text_columns: bool = False,
+                          chunk_size: int = SNAPSHOT_CHUNK) -> dict:
+    """Write every snapshot table under output and return the manifest"""
+    if os.path.exists(output):
+        raise FileExistsError(output)
+    # Written next to the destination and renamed at the end, so output is complete or absent
+    partial = f"{output}.partial"
+    shutil.rmtree(partial, ignore_errors=True)
+    os.makedirs(partial)
+
+    engine = create_async_engine(database_url)
+    try:
+        async with engine.connect() as conn:
+            await conn.execution_options(isolation_level="REPEATABLE READ", postgresql_readonly=True)
+            async with conn.begin():
+                manifest = {
+                    "format": SNAPSHOT_FORMAT,
+                    "version": SNAPSHOT_VERSION,
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "tables": {},
+                }
+                for name, (table, sort_columns) in SNAPSHOT_TABLES.items():
+                    manifest["tables"][name] = await export_table(conn, partial, name, table, sort_columns, text_columns, chunk_size)
+    except BaseException:
+        shutil.rmtree(partial, ignore_errors=True)
+        raise
+    finally:
+        await engine.dispose()
+
+    with open(os.path.join(partial, "manifest.json"), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.rename(partial, output)
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0], formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog=__doc__.split('\n', 1)[1])
+    parser.add_argument('output', help="directory to create for the snapshot")
+    parser.add_argument('--database-url', default=os.environ.get('SNAPSHOT_DATABASE_URL', DATABASE_URL),
+                        help="database to read; point it at a replica to keep the export off the primary")
+    parser.add_argument('--text', action='store_true', help="also export descriptions, biographies and review content")
+    parser.add_argument('--chunk', type=int, default=SNAPSHOT_CHUNK, help="rows fetched per round trip")
+    args = parser.parse_args()
+
+    manifest = asyncio.run(export_snapshot(args.output, args.database_url, args.text, args.chunk))
+    for name, table in manifest["tables"].items():
+        print(f"{name}: {table['rows']} rows")
+
+if __name__ == '__main__':
+    main()
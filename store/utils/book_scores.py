@@ -0,0 +1,87 @@
+import os
+import math
+from datetime import datetime, timezone
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from store.models.db_model import BookScore, CategoryBookScore, book_category
+
+# Reviews at the prior mean every book is assumed to start with, so a single 5-star review
+# does not outrank hundreds of 4.8s on the top rated list
+BAYESIAN_PRIOR_COUNT = float(os.environ.get('BAYESIAN_PRIOR_COUNT', 10))
+BAYESIAN_PRIOR_MEAN = float(os.environ.get('BAYESIAN_PRIOR_MEAN', 3.5))
+# A review counts half as much toward trending after this many days
+TRENDING_HALF_LIFE_DAYS = float(os.environ.get('TRENDING_HALF_LIFE_DAYS', 7))
+
+# Trending scores are log2 of the sum of the reviews' weights 2^(age in half-lives), with ages
+# measured from this fixed instant rather than from now. Decaying every book by the same
+# factor would not change their order, so the stored scores never need to be recomputed.
+TRENDING_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+def trending_weight(at: datetime) -> float:
+    """log2 weight of a review written at the given time"""
+    return (at - TRENDING_EPOCH).total_seconds() / (TRENDING_HALF_LIFE_DAYS * 86400)
+
+def recent_reviews(trending_score: float, now: datetime) -> float:
+    """Half-life weighted number of reviews as of now, for display"""
+    return 2 ** (trending_score - trending_weight(now))
+
+def _bayesian(review_count, rating_sum):
+    return (BAYESIAN_PRIOR_COUNT * BAYESIAN_PRIOR_MEAN + rating_sum) / (BAYESIAN_PRIOR_COUNT + review_count)
+
+async def record_review(db: AsyncSession, book_id: int, rating: float, created_at: datetime):
+    """Add a new review to its book's scores, in the transaction that writes the review"""
+    weight = trending_weight(created_at)
+    statement = insert(BookScore).values(
+        book_id=book_id,
+        review_count=1,
+        rating_sum=rating,
+        bayesian_rating=_bayesian(1, rating),
+        trending_score=weight
+    )
+    # Computed from the stored row, so concurrent reviews of one book cannot lose an update;
+    # trending adds 2^weight to 2^score without leaving log space
+    statement = statement.on_conflict_do_update(
+        index_elements=[BookScore.book_id],
+        set_={
+            "review_count": BookScore.review_count + 1,
+            "rating_sum": BookScore.rating_sum + rating,
+            "bayesian_rating": _bayesian(BookScore.review_count + 1, BookScore.rating_sum + rating),
+            "trending_score": func.greatest(BookScore.trending_score, weight)
+                              + func.ln(1 + func.power(2.0, -func.abs(BookScore.trending_score - weight))) / math.log(2),
+        }
+    )
+    await db.execute(statement)
+    await sync_category_scores(db, book_id)
+
+async def change_rating(db: AsyncSession, book_id: int, old_rating: float, new_rating: float):
+    """Apply an edited review rating to its book's scores"""
+    await db.execute(
+        update(BookScore)
+        .where(BookScore.book_id == book_id)
+        .values(
+            rating_sum=BookScore.rating_sum + (new_rating - old_rating),
+            bayesian_rating=_bayesian(BookScore.review_count, BookScore.rating_sum + (new_rating - old_rating))
+        )
+    )
+    await sync_category_scores(db, book_id)
+
+async def sync_category_scores(db: AsyncSession, book_id: int):
+    """Copy a book's Bayesian rating to the category rankings of its current categories"""
+    categories = select(book_category.c.category_id).where(book_category.c.book_id == book_id,
+                                                           book_category.c.category_id.is_not(None))
+    await db.execute(
+        delete(CategoryBookScore)
+        .where(CategoryBookScore.book_id == book_id, CategoryBookScore.category_id.not_in(categories))
+    )
+    statement = insert(CategoryBookScore).from_select(
+        ["category_id", "book_id", "bayesian_rating"],
+        select(book_category.c.category_id, BookScore.book_id, BookScore.bayesian_rating).distinct()
+        .join(BookScore, BookScore.book_id == book_category.c.book_id)
+        .where(book_category.c.book_id == book_id)
+    )
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=[CategoryBookScore.category_id, CategoryBookScore.book_id],
+        set_={"bayesian_rating": statement.excluded.bayesian_rating}
+    ))
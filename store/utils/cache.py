@@ -0,0 +1,74 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from store.utils.metrics import CACHE_LOOKUPS
+from store.utils.invalidation import invalidation_bus
+
+USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', 300))
+USER_CACHE_NEGATIVE_TTL = float(os.environ.get('USER_CACHE_NEGATIVE_TTL', 30))
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 100000))
+
+_MISSING = object()
+
+class TTLCache:
+    """Bounded in-process LRU cache whose entries expire after a time-to-live"""
+
+    def __init__(self, ttl: float, maxsize: int = 10000, name: str = "default"):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._hit_metric = CACHE_LOOKUPS.labels(name, "hit")
+        self._miss_metric = CACHE_LOOKUPS.labels(name, "miss")
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if it is missing or expired"""
+        entry = self._entries.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            self._miss_metric.inc()
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            self._miss_metric.inc()
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self._hit_metric.inc()
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entry when full"""
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            self._entries.pop(key, None)
+            return
+
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry"""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        self._entries.clear()
+
+
+# Whether a user id exists, so authenticated requests can skip the users lookup.
+# Unknown ids are cached as False for a shorter time (negative caching).
+user_cache = TTLCache(ttl=USER_CACHE_TTL, maxsize=USER_CACHE_SIZE, name="user")
+invalidation_bus.subscribe("user", user_cache.invalidate, flush=user_cache.clear)
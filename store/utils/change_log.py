@@ -0,0 +1,36 @@
+import os
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from store.database import engine
+from store.models.db_model import ChangeLog
+
+CHANGE_TYPES = ('book', 'author', 'category', 'review')
+
+# Consumers that fall further behind than this must resync from the full listings
+CHANGE_LOG_RETENTION_DAYS = float(os.environ.get('CHANGE_LOG_RETENTION_DAYS', 30))
+CHANGE_LOG_PRUNE_INTERVAL = float(os.environ.get('CHANGE_LOG_PRUNE_INTERVAL', 3600))
+CHANGE_LOG_PRUNE_CHUNK = 10000
+
+def record_change(db: AsyncSession, entity_type: str, entity_ids: Iterable[Optional[int]]):
+    """Add change feed entries to the session; they commit or roll back with the write itself"""
+    db.add_all([ChangeLog(entity_type=entity_type, entity_id=entity_id) for entity_id in set(entity_ids) if entity_id])
+
+async def prune_change_log(retention_days: float = CHANGE_LOG_RETENTION_DAYS, chunk_size: int = CHANGE_LOG_PRUNE_CHUNK) -> int:
+    """Delete entries older than the retention period in short transactions"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    deleted = 0
+    while True:
+        async with engine.begin() as conn:
+            result = await conn.execute(text("""
+                DELETE FROM change_log WHERE id IN (
+                    SELECT id FROM change_log WHERE changed_at < :cutoff LIMIT :chunk
+                )
+            """), {"cutoff": cutoff, "chunk": chunk_size})
+        deleted += result.rowcount
+        if result.rowcount < chunk_size:
+            return deleted
+        await asyncio.sleep(0)
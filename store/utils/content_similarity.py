@@ -0,0 +1,104 @@
+import os
+import math
+from typing import Iterable, Optional
+
+from store.utils.cache import TTLCache
+from store.utils.facets import FacetIndex, facet_index, _ids_from_bitmap
+
+# Weight of a shared author; a shared category weighs 1 to CONTENT_CATEGORY_WEIGHT, rarer ones more
+CONTENT_AUTHOR_WEIGHT = int(os.environ.get('CONTENT_AUTHOR_WEIGHT', 8))
+CONTENT_CATEGORY_WEIGHT = int(os.environ.get('CONTENT_CATEGORY_WEIGHT', 8))
+CONTENT_SIMILARITY_CACHE_SIZE = int(os.environ.get('CONTENT_SIMILARITY_CACHE_SIZE', 4096))
+
+def _add(slices: list[int], bitmap: int, weight: int):
+    """Add weight to the counter of every book in bitmap.
+
+    The counters are bit-sliced: slices[j] holds bit j of every book's counter, so one
+    addition is a few whole-bitmap XOR/AND carries instead of a loop over books.
+    """
+    for position in range(weight.bit_length()):
+        if not weight >> position & 1:
+            continue
+        carry = bitmap
+        while carry:
+            if position >= len(slices):
+                slices.extend([0] * (position + 1 - len(slices)))
+            bits = slices[position]
+            slices[position] = bits ^ carry
+            carry &= bits
+            position += 1
+
+def _top(slices: list[int], candidates: int, limit: int) -> list[int]:
+    """Ids of the limit candidates with the highest counters, found slice by slice from the top bit"""
+    chosen, tied = 0, candidates
+    for bits in reversed(slices):
+        higher = chosen | (tied & bits)
+        count = higher.bit_count()
+        if count > limit:
+            tied &= bits
+        else:
+            chosen = higher
+            tied &= ~bits
+            if count == limit:
+                break
+    ids = _ids_from_bitmap(chosen, limit)
+    # Books tied at the cut-off fill the remaining places, lowest ids first
+    if len(ids) < limit:
+        ids += _ids_from_bitmap(tied, limit - len(ids))
+    return ids
+
+def _counters(slices: list[int], ids: list[int]) -> list[int]:
+    raws = [bits.to_bytes((bits.bit_length() + 7) // 8, 'little') for bits in slices]
+    return [
+        sum(1 << position for position, raw in enumerate(raws)
+            if book_id >> 3 < len(raw) and raw[book_id >> 3] >> (book_id & 7) & 1)
+        for book_id in ids
+    ]
+
+class ContentSimilarity:
+    """Ranks the catalog against one book by weighted category and author overlap.
+
+    Works on the facet index postings, so big categories cost a few bitmap operations rather
+    than a self-join on book_category, and book writes reach it through the facet index.
+    """
+
+    def __init__(self, index: FacetIndex, cache_size: int = CONTENT_SIMILARITY_CACHE_SIZE):
+        self.index = index
+        # Keyed by the facet index version, so any catalog change retires earlier entries
+        self._results = TTLCache(ttl=3600, maxsize=cache_size, name="content_similar")
+
+    @property
+    def ready(self) -> bool:
+        return self.index.ready
+
+    def similar(self, book_id: int, author_id: Optional[int], category_ids: Iterable[int], limit: int) -> list[tuple[int, float]]:
+        """Best matches as (book_id, score), score being the share of the book's own weight matched"""
+        category_ids = tuple(sorted(set(category_ids)))
+        cache_key = (book_id, author_id, category_ids, limit, self.index.version)
+        cached = self._results.get(cache_key)
+        if cached is not None:
+            return cached
+
+        total = max(self.index.total(), 2)
+        slices, candidates, best = [], 0, 0
+        features = [(self.index.postings("category", category_id), None) for category_id in category_ids]
+        if author_id:
+            features.append((self.index.postings("author", author_id), CONTENT_AUTHOR_WEIGHT))
+        for bitmap, weight in features:
+            if not bitmap:
+                continue
+            if weight is None:
+                rarity = math.log(total / min(bitmap.bit_count(), total)) / math.log(total)
+                weight = 1 + round((CONTENT_CATEGORY_WEIGHT - 1) * rarity)
+            _add(slices, bitmap, weight)
+            candidates |= bitmap
+            best += weight
+        candidates &= ~(1 << book_id)
+
+        ids = _top(slices, candidates, limit)
+        scored = sorted(zip(ids, _counters(slices, ids)), key=lambda item: (-item[1], item[0]))
+        result = [(similar_id, round(counter / best, 4)) for similar_id, counter in scored]
+        self._results.set(cache_key, result)
+        return result
+
+content_similarity = ContentSimilarity(facet_index)
@@ -0,0 +1,179 @@
+import os
+import time
+import asyncio
+import logging
+from sqlalchemy import text
+
+from store.database import engine
+from store.utils.book_scores import BAYESIAN_PRIOR_COUNT, BAYESIAN_PRIOR_MEAN, TRENDING_EPOCH, TRENDING_HALF_LIFE_DAYS
+from store.utils.metrics import COUNTER_DRIFT, COUNTER_LAST_DRIFT, COUNTER_RECONCILE_SECONDS
+
+COUNTER_RECONCILE_CHUNK = int(os.environ.get('COUNTER_RECONCILE_CHUNK', 10000))
+# Pause between chunks so reconciliation never holds row locks or I/O for long
+COUNTER_RECONCILE_PAUSE = float(os.environ.get('COUNTER_RECONCILE_PAUSE', 0.05))
+
+logger = logging.getLogger(__name__)
+
+# Largest id covered by a full pass; counters are recomputed for ids in [lo, hi]
+MAX_ID = 2 ** 31 - 1
+
+RECENT_REVIEWS_LIMIT = 5
+
+# Set-based recomputation of every denormalized counter. Each statement only writes rows whose
+# stored value differs, so the affected row count is the drift that was corrected.
+COUNTER_UPDATES = {
+    "author_book_count": text("""
+        UPDATE authors AS target SET book_count = agg.value
+        FROM (
+            SELECT authors.id, count(books.id) AS value
+            FROM authors LEFT JOIN books ON books.author_id = authors.id
+            WHERE authors.id BETWEEN :lo AND :hi
+            GROUP BY authors.id
+        ) AS agg
+        WHERE target.id = agg.id AND target.book_count IS DISTINCT FROM agg.value
+    """),
+    "category_book_count": text("""
+        UPDATE categories AS target SET book_count = agg.value
+        FROM (
+            SELECT categories.id, count(book_category.book_id) AS value
+            FROM categories LEFT JOIN book_category ON book_category.category_id = categories.id
+            WHERE categories.id BETWEEN :lo AND :hi
+            GROUP BY categories.id
+        ) AS agg
+        WHERE target.id = agg.id AND target.book_count IS DISTINCT FROM agg.value
+    """),
+    "user_review_count": text("""
+        UPDATE users AS target SET review_count = agg.value
+        FROM (
+            SELECT users.id, count(reviews.id) AS value
+            FROM users LEFT JOIN reviews ON reviews.user_id = users.id
+            WHERE users.id BETWEEN :lo AND :hi
+            GROUP BY users.id
+        ) AS agg
+        WHERE target.id = agg.id AND target.review_count IS DISTINCT FROM agg.value
+    """),
+    "user_recent_reviews": text(f"""
+        UPDATE users AS target SET recent_reviews = agg.value
+        FROM (
+            SELECT users.id,
+                   coalesce(
+                       array_agg(
+                           jsonb_build_object(
+                               'id', recent.id,
+                               'book', jsonb_build_object('id', books.id, 'title', books.title),
+                               'rating', recent.rating,
+                               'created_at', recent.created_at
+                           ) ORDER BY recent.created_at DESC, recent.id DESC
+                       ) FILTER (WHERE recent.id IS NOT NULL),
+                       '{{}}'::jsonb[]
+                   ) AS value
+            FROM users
+            LEFT JOIN LATERAL (
+                SELECT reviews.id, reviews.book_id, reviews.rating, reviews.created_at
+                FROM reviews
+                WHERE reviews.user_id = users.id
+                ORDER BY reviews.created_at DESC, reviews.id DESC
+                LIMIT {RECENT_REVIEWS_LIMIT}
+            ) AS recent ON true
+            LEFT JOIN books ON books.id = recent.book_id
+            WHERE users.id BETWEEN :lo AND :hi
+            GROUP BY users.id
+        ) AS agg
+        WHERE target.id = agg.id AND target.recent_reviews IS DISTINCT FROM agg.value
+    """),
+    "book_average_rating": text("""
+        UPDATE books AS target SET average_rating = agg.value
+        FROM (
+            SELECT books.id, coalesce(round(avg(reviews.rating)::numeric, 1), 0)::float AS value
+            FROM books LEFT JOIN reviews ON reviews.book_id = books.id
+            WHERE books.id BETWEEN :lo AND :hi
+            GROUP BY books.id
+        ) AS agg
+        WHERE target.id = agg.id AND target.average_rating IS DISTINCT FROM agg.value
+    """),
+    # Sums of floats depend on the order they were added in, hence the tolerance
+    "book_scores": text(f"""
+        INSERT INTO book_scores AS target (book_id, review_count, rating_sum, bayesian_rating, trending_score)
+        SELECT book_id, count(*), sum(rating),
+               ({BAYESIAN_PRIOR_COUNT} * {BAYESIAN_PRIOR_MEAN} + sum(rating)) / ({BAYESIAN_PRIOR_COUNT} + count(*)),
+               max(top_weight) + ln(sum(power(2.0, weight - top_weight))) / ln(2.0)
+        FROM (
+            SELECT book_id, rating, weight, max(weight) OVER (PARTITION BY book_id) AS top_weight
+            FROM (
+                SELECT book_id, rating,
+                       extract(epoch FROM coalesce(created_at, '{TRENDING_EPOCH.isoformat()}') - '{TRENDING_EPOCH.isoformat()}'::timestamptz)
+                       / {TRENDING_HALF_LIFE_DAYS * 86400} AS weight
+                FROM reviews
+                WHERE book_id BETWEEN :lo AND :hi
+            ) AS weighted
+        ) AS reviews
+        GROUP BY book_id
+        ON CONFLICT (book_id) DO UPDATE SET
+            review_count = excluded.review_count,
+            rating_sum = excluded.rating_sum,
+            bayesian_rating = excluded.bayesian_rating,
+            trending_score = excluded.trending_score
+        WHERE target.review_count IS DISTINCT FROM excluded.review_count
+           OR abs(target.rating_sum - excluded.rating_sum) > 1e-6
+           OR abs(target.trending_score - excluded.trending_score) > 1e-6
+           OR abs(target.bayesian_rating - excluded.bayesian_rating) > 1e-6
+    """),
+    # After book_scores, whose ratings they copy
+    "category_book_scores": text("""
+        INSERT INTO category_book_scores AS target (category_id, book_id, bayesian_rating)
+        SELECT DISTINCT book_category.category_id, book_scores.book_id, book_scores.bayesian_rating
+        FROM book_category JOIN book_scores ON book_scores.book_id = book_category.book_id
+        WHERE book_category.book_id BETWEEN :lo AND :hi
+        ON CONFLICT (category_id, book_id) DO UPDATE SET bayesian_rating = excluded.bayesian_rating
+        WHERE abs(target.bayesian_rating - excluded.bayesian_rating) > 1e-6
+    """),
+    "category_book_scores_stale": text("""
+        DELETE FROM category_book_scores AS target
+        WHERE target.book_id BETWEEN :lo AND :hi
+          AND NOT EXISTS (
+              SELECT 1 FROM book_category
+              WHERE book_category.book_id = target.book_id AND book_category.category_id = target.category_id
+          )
+    """),
+}
+
+# Table whose ids each counter statement ranges over
+COUNTER_TABLES = {
+    "author_book_count": "authors",
+    "category_book_count": "categories",
+    "user_review_count": "users",
+    "user_recent_reviews": "users",
+    "book_average_rating": "books",
+    "book_scores": "books",
+    "category_book_scores": "books",
+    "category_book_scores_stale": "books",
+}
+
+async def recompute_counters(conn, lo: int = 0, hi: int = MAX_ID) -> dict[str, int]:
+    """Recompute every counter for ids in [lo, hi] and return the rows corrected per counter"""
+    corrected = {}
+    for name, statement in COUNTER_UPDATES.items():
+        result = await conn.execute(statement, {"lo": lo, "hi": hi})
+        corrected[name] = result.rowcount
+    return corrected
+
+async def reconcile_counters(chunk_size: int = COUNTER_RECONCILE_CHUNK, pause: float = COUNTER_RECONCILE_PAUSE) -> dict[str, int]:
+    """Recompute every counter in short id-range transactions and record the drift corrected"""
+    drift = {}
+    for name, statement in COUNTER_UPDATES.items():
+        started = time.perf_counter()
+        async with engine.connect() as conn:
+            max_id = (await conn.execute(text(f"SELECT coalesce(max(id), 0) FROM {COUNTER_TABLES[name]}"))).scalar()
+        corrected = 0
+        for lo in range(0, max_id + 1, chunk_size):
+            async with engine.begin() as conn:
+                result = await conn.execute(statement, {"lo": lo, "hi": lo + chunk_size - 1})
+                corrected += result.rowcount
+            await asyncio.sleep(pause)
+        drift[name] = corrected
+        COUNTER_DRIFT.labels(name).inc(corrected)
+        COUNTER_LAST_DRIFT.labels(name).set(corrected)
+        COUNTER_RECONCILE_SECONDS.labels(name).set(time.perf_counter() - started)
+        if corrected:
+            logger.warning("Corrected %d drifted %s values", corrected, name)
+    return drift
@@ -0,0 +1,104 @@
+import os
+import re
+import time
+import logging
+from contextvars import ContextVar
+from typing import Optional
+from fastapi import HTTPException, status
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from store.database import engine
+from store.utils.metrics import QUERY_TIMEOUTS, UNMATCHED_ROUTE
+
+# Seconds a request may spend on SQL in total, unless its route has a budget of its own
+REQUEST_TIMEOUT = float(os.environ.get('REQUEST_TIMEOUT', 5))
+
+# Reads whose cost grows with the size of a category or the popularity of a book get less,
+# so one outlier cannot hold pooled connections for long. ROUTE_TIMEOUTS="/path=seconds,..."
+# adds or overrides entries; they apply to GET and HEAD, writes keep REQUEST_TIMEOUT.
+ROUTE_TIMEOUTS = {
+    "/categories/{category_id}": 2.0,
+    "/books/{book_id}/reviews/": 2.0,
+    "/books/{book_id}/similar": 2.0,
+    "/books/top": 2.0,
+}
+for _entry in filter(None, os.environ.get('ROUTE_TIMEOUTS', '').split(',')):
+    _path, _seconds = _entry.rsplit('=', 1)
+    ROUTE_TIMEOUTS[_path.strip()] = float(_seconds)
+
+# PostgreSQL SQLSTATE of a statement cancelled by statement_timeout
+QUERY_CANCELED = "57014"
+
+logger = logging.getLogger(__name__)
+
+class RequestBudget:
+    """Time budget of one request, resolved against its route once the router has matched it"""
+    __slots__ = ('scope', 'started')
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.started = time.monotonic()
+
+    @property
+    def route(self) -> str:
+        return getattr(self.scope.get("route"), "path", UNMATCHED_ROUTE)
+
+    @property
+    def timeout(self) -> float:
+        if self.scope["method"] not in ('GET', 'HEAD'):
+            return REQUEST_TIMEOUT
+        return ROUTE_TIMEOUTS.get(self.route, REQUEST_TIMEOUT)
+
+    def remaining(self) -> float:
+        return self.timeout - (time.monotonic() - self.started)
+
+_current_budget: ContextVar[Optional[RequestBudget]] = ContextVar('request_budget', default=None)
+
+class DeadlineMiddleware:
+    """ASGI middleware starting the SQL time budget of every request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _current_budget.set(RequestBudget(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_budget.reset(token)
+
+def sql_shape(statement: str) -> str:
+    """Statement text on one line and shortened; parameters are already placeholders"""
+    shape = re.sub(r'\s+', ' ', statement).strip()
+    return shape if len(shape) <= 300 else shape[:300] + '...'
+
+@event.listens_for(Session, "after_begin")
+def _set_statement_timeout(session, transaction, connection):
+    """Limit every statement of a request's transaction to what is left of the request's budget"""
+    budget = _current_budget.get()
+    if budget is None:
+        return
+    remaining = budget.remaining()
+    if remaining <= 0:
+        QUERY_TIMEOUTS.labels(budget.route, "exhausted").inc()
+        logger.warning("Time budget of %s spent before its transaction began", budget.route)
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Request time budget exceeded",
+                            headers={"Retry-After": "1"})
+    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {max(1, int(remaining * 1000))}")
+
+@event.listens_for(engine.sync_engine, "handle_error")
+def _statement_timeout_error(context):
+    """Turn a statement cancelled by its timeout into a 504 that the services pass through"""
+    original = context.original_exception
+    sqlstate = getattr(original, "sqlstate", None) or getattr(getattr(original, "__cause__", None), "sqlstate", None)
+    if sqlstate != QUERY_CANCELED:
+        return
+    budget = _current_budget.get()
+    route = budget.route if budget is not None else UNMATCHED_ROUTE
+    QUERY_TIMEOUTS.labels(route, "cancelled").inc()
+    logger.warning("Statement cancelled by the time budget of %s: %s", route, sql_shape(context.statement or ""))
+    raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Query exceeded the time budget of this route")
@@ -7,6 +7,7 @@ from sqlalchemy.future import select
 from store.database import get_database
 from store.models.auth_model import TokenPayload
 from store.utils.util import validate_token
+from store.utils.cache import user_cache, USER_CACHE_NEGATIVE_TTL
 from store.models.db_model import User
 
 oauth2_bearer = HTTPBearer()
@@ -62,11 +63,15 @@ async def get_current_user(token_data: TokenPayload = Depends(validate_access_to
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Verify user exists in database
-    result = await db.execute(select(User).where(User.id == int(token_data.user_id)))
-    user = result.scalars().first()
+    # Verify user exists, consulting the in-process cache before the database
+    user_id = int(token_data.user_id)
+    user_exists = user_cache.get(user_id)
+    if user_exists is None:
+        result = await db.execute(select(User.id).where(User.id == user_id))
+        user_exists = result.scalar() is not None
+        user_cache.set(user_id, user_exists, ttl=None if user_exists else USER_CACHE_NEGATIVE_TTL)
     
-    if user is None:
+    if not user_exists:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
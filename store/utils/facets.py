@@ -0,0 +1,273 @@
+import os
+import re
+import sys
+import bisect
+import asyncio
+import logging
+from array import array
+from datetime import date
+from typing import Iterable, Optional
+from sqlalchemy import func
+from sqlalchemy.future import select
+
+from store.database import async_session
+from store.models.db_model import Book, book_category
+from store.utils.cache import TTLCache
+from store.utils.invalidation import invalidation_bus
+
+FACET_MEMORY_BUDGET_MB = float(os.environ.get('FACET_MEMORY_BUDGET_MB', 256))
+FACET_RESULT_CACHE_SIZE = int(os.environ.get('FACET_RESULT_CACHE_SIZE', 1024))
+
+# Facets with few distinct values are kept as bitmaps (Python ints, bit n set for book id n);
+# authors have many values with a handful of books each and are kept as sorted id arrays
+BITMAP_FACETS = ('language', 'decade', 'category')
+
+logger = logging.getLogger(__name__)
+
+_NONZERO_BYTE = re.compile(rb'[^\x00]')
+
+def book_facets(book: Book) -> dict:
+    """Facet values of a loaded Book entity, as accepted by FacetIndex.add_book"""
+    return {
+        "language": book.language,
+        "author_id": book.author_id,
+        "publication_date": book.publication_date,
+        "category_ids": [category.id for category in book.categories]
+    }
+
+def _facet_values(language: Optional[str], publication_date: Optional[date], category_ids: Iterable[int]) -> dict:
+    return {
+        "language": [language] if language else [],
+        "decade": [publication_date.year // 10 * 10] if publication_date else [],
+        "category": list(category_ids or [])
+    }
+
+def _bitmap_from_ids(ids: Iterable[int]) -> int:
+    ids = list(ids)
+    if not ids:
+        return 0
+    bits = bytearray(max(ids) // 8 + 1)
+    for book_id in ids:
+        bits[book_id >> 3] |= 1 << (book_id & 7)
+    return int.from_bytes(bits, 'little')
+
+def _ids_from_bitmap(bitmap: int, limit: int) -> list[int]:
+    ids = []
+    if limit <= 0:
+        return ids
+    raw = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    for match in _NONZERO_BYTE.finditer(raw):
+        byte_index = match.start()
+        byte = raw[byte_index]
+        for bit in range(8):
+            if byte >> bit & 1:
+                ids.append(byte_index * 8 + bit)
+                if len(ids) == limit:
+                    return ids
+    return ids
+
+class FacetIndex:
+    """In-process index answering catalog filter intersections and facet counts"""
+
+    def __init__(self, memory_budget_mb: float = FACET_MEMORY_BUDGET_MB):
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.ready = False
+        # Bumped on every change, so results derived from the postings can be cached per version
+        self.version = 0
+        self._universe = 0
+        self._bitmaps: dict[str, dict] = {facet: {} for facet in BITMAP_FACETS}
+        self._authors: dict[int, array] = {}
+        self._replay: Optional[list] = None
+        self._rebuild_task: Optional[asyncio.Task] = None
+        # Recent search results; browsing pages repeat the same filter combinations
+        self._results = TTLCache(ttl=300, maxsize=FACET_RESULT_CACHE_SIZE, name="facet_results")
+
+    def add_book(self, book_id: int, language: Optional[str], author_id: Optional[int],
+                 publication_date: Optional[date], category_ids: Iterable[int]):
+        """Index a new book, or the new facet values of an updated one"""
+        if self._replay is not None:
+            self._replay.append((self.add_book, book_id, language, author_id, publication_date, category_ids))
+        self.version += 1
+        self._results.clear()
+        bit = 1 << book_id
+        self._universe |= bit
+        for facet, values in _facet_values(language, publication_date, category_ids).items():
+            postings = self._bitmaps[facet]
+            for value in values:
+                postings[value] = postings.get(value, 0) | bit
+        if author_id:
+            ids = self._authors.setdefault(author_id, array('I'))
+            position = bisect.bisect_left(ids, book_id)
+            if position == len(ids) or ids[position] != book_id:
+                ids.insert(position, book_id)
+
+    def remove_book(self, book_id: int, language: Optional[str], author_id: Optional[int],
+                    publication_date: Optional[date], category_ids: Iterable[int]):
+        """Drop the given facet values of a book, e.g. its values before an update"""
+        if self._replay is not None:
+            self._replay.append((self.remove_book, book_id, language, author_id, publication_date, category_ids))
+        self.version += 1
+        self._results.clear()
+        bit = 1 << book_id
+        self._universe &= ~bit
+        for facet, values in _facet_values(language, publication_date, category_ids).items():
+            postings = self._bitmaps[facet]
+            for value in values:
+                remaining = postings.get(value, 0) & ~bit
+                if remaining:
+                    postings[value] = remaining
+                else:
+                    postings.pop(value, None)
+        ids = self._authors.get(author_id)
+        if ids is not None:
+            position = bisect.bisect_left(ids, book_id)
+            if position < len(ids) and ids[position] == book_id:
+                del ids[position]
+            if not ids:
+                del self._authors[author_id]
+
+    def apply_change(self, book_id: int, old: Optional[dict], new: Optional[dict]):
+        """Replace the facet values of a book, as published after a book write"""
+        for facets, method in ((old, self.remove_book), (new, self.add_book)):
+            if facets:
+                publication_date = facets["publication_date"]
+                if isinstance(publication_date, str):
+                    publication_date = date.fromisoformat(publication_date)
+                method(book_id, facets["language"], facets["author_id"], publication_date, facets["category_ids"])
+
+    def schedule_rebuild(self) -> asyncio.Task:
+        """Rebuild in the background unless a rebuild is already running"""
+        if self._rebuild_task is None or self._rebuild_task.done():
+            self._rebuild_task = asyncio.get_running_loop().create_task(self.rebuild())
+        return self._rebuild_task
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held by the postings"""
+        total = sys.getsizeof(self._universe)
+        for postings in self._bitmaps.values():
+            total += sum(sys.getsizeof(bitmap) for bitmap in postings.values())
+        total += sum(ids.itemsize * len(ids) for ids in self._authors.values())
+        return total
+
+    async def rebuild(self):
+        """Load the catalog into fresh postings and swap them in"""
+        self._replay = []
+        try:
+            async with async_session() as db:
+                max_id = (await db.execute(select(func.max(Book.id)))).scalar() or 0
+                size = max_id // 8 + 1
+                bits = {facet: {} for facet in BITMAP_FACETS}
+                authors: dict[int, array] = {}
+                universe = bytearray(size)
+                used = size
+
+                def set_bit(facet: str, value, book_id: int):
+                    nonlocal used
+                    postings = bits[facet]
+                    if value not in postings:
+                        used += size
+                        if used > self.memory_budget:
+                            raise MemoryError(f"facet index exceeds its {self.memory_budget} byte budget")
+                        postings[value] = bytearray(size)
+                    postings[value][book_id >> 3] |= 1 << (book_id & 7)
+
+                books = await db.stream(
+                    select(Book.id, Book.language, Book.author_id, Book.publication_date)
+                    .where(Book.id <= max_id)
+                    .order_by(Book.id)
+                    .execution_options(yield_per=10000)
+                )
+                async for book_id, language, author_id, publication_date in books:
+                    universe[book_id >> 3] |= 1 << (book_id & 7)
+                    for facet, values in _facet_values(language, publication_date, []).items():
+                        for value in values:
+                            set_bit(facet, value, book_id)
+                    if author_id:
+                        authors.setdefault(author_id, array('I')).append(book_id)
+                        used += 4
+
+                links = await db.stream(
+                    select(book_category.c.book_id, book_category.c.category_id)
+                    .where(book_category.c.book_id <= max_id)
+                    .execution_options(yield_per=10000)
+                )
+                async for book_id, category_id in links:
+                    if book_id is not None and category_id is not None:
+                        set_bit("category", category_id, book_id)
+
+            self._universe = int.from_bytes(universe, 'little')
+            self._bitmaps = {
+                facet: {value: int.from_bytes(raw, 'little') for value, raw in postings.items()}
+                for facet, postings in bits.items()
+            }
+            self._authors = authors
+            self.version += 1
+            self._results.clear()
+            replay, self._replay = self._replay, None
+            for method, *args in replay:
+                method(*args)
+            self.ready = True
+            logger.info("Facet index built for %d books using %d bytes", max_id, self.memory_usage())
+        except MemoryError as e:
+            self._replay = None
+            self.ready = False
+            logger.warning("Facet index disabled: %s", e)
+        except BaseException:
+            self._replay = None
+            raise
+
+    def _filter_bitmap(self, facet: str, values: list) -> int:
+        if facet == "author":
+            return _bitmap_from_ids(book_id for author_id in values for book_id in self._authors.get(author_id, ()))
+        postings = self._bitmaps[facet]
+        bitmap = 0
+        for value in values:
+            bitmap |= postings.get(value, 0)
+        return bitmap
+
+    def postings(self, facet: str, value) -> int:
+        """Bitmap of the books with one value of a facet; author postings are built on demand"""
+        return self._filter_bitmap(facet, [value])
+
+    def total(self) -> int:
+        return self._universe.bit_count()
+
+    def _matching(self, filters: dict[str, list], skip: Optional[str] = None) -> int:
+        bitmap = self._universe
+        for facet, values in filters.items():
+            if values and facet != skip:
+                bitmap &= self._filter_bitmap(facet, values)
+        return bitmap
+
+    def search(self, filters: dict[str, list], after_id: int = 0, limit: int = 20) -> dict:
+        """Count the books matching every filter and list facet counts for further refinement.
+
+        Values within a facet are alternatives (OR) and facets combine with AND. Each facet's
+        counts ignore that facet's own filter, so the other values stay selectable.
+        """
+        cache_key = (tuple((facet, tuple(sorted(values))) for facet, values in sorted(filters.items())), after_id, limit)
+        cached = self._results.get(cache_key)
+        if cached is not None:
+            return cached
+
+        matching = self._matching(filters)
+        page = matching >> (after_id + 1) << (after_id + 1)
+        facets = {}
+        for facet in BITMAP_FACETS:
+            base = self._matching(filters, skip=facet)
+            counts = {}
+            for value, bitmap in self._bitmaps[facet].items():
+                count = (bitmap & base).bit_count()
+                if count:
+                    counts[str(value)] = count
+            facets[facet] = dict(sorted(counts.items(), key=lambda item: -item[1]))
+        result = {
+            "total": matching.bit_count(),
+            "book_ids": _ids_from_bitmap(page, limit),
+            "facets": facets
+        }
+        self._results.set(cache_key, result)
+        return result
+
+facet_index = FacetIndex()
+invalidation_bus.subscribe("book", facet_index.apply_change, flush=facet_index.schedule_rebuild)
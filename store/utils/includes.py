@@ -0,0 +1,33 @@
+import asyncio
+from typing import Awaitable, Callable, Optional
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from store.database import async_session
+
+BOOK_INCLUDES = ('author', 'categories', 'reviews', 'rating_histogram')
+AUTHOR_INCLUDES = ('categories', 'rating_histogram')
+
+def parse_include(include: Optional[str], allowed: tuple[str, ...], name: str = "include") -> tuple[str, ...]:
+    """Split a comma separated parameter into a sorted tuple of known parts"""
+    if not include:
+        return ()
+    parts = {part.strip() for part in include.split(',') if part.strip()}
+    unknown = parts.difference(allowed)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown {name}: {', '.join(sorted(unknown))}. Allowed: {', '.join(allowed)}")
+    return tuple(sorted(parts))
+
+async def resolve_includes(db: AsyncSession, loaders: dict[str, Callable[[AsyncSession], Awaitable]]) -> dict:
+    """Run the loaders concurrently and return their results by name.
+
+    A session runs one statement at a time, so the first loader uses the caller's session
+    and every other loader gets a session of its own.
+    """
+    async def run_on_own_session(loader):
+        async with async_session() as own_db:
+            return await loader(own_db)
+
+    names = list(loaders)
+    calls = [loader(db) if index == 0 else run_on_own_session(loader) for index, loader in enumerate(loaders.values())]
+    return dict(zip(names, await asyncio.gather(*calls)))
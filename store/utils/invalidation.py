@@ -0,0 +1,133 @@
+import os
+import uuid
+import asyncio
+import logging
+from typing import Callable, Optional
+
+import asyncpg
+import orjson
+
+from store.database import engine
+
+INVALIDATION_CHANNEL = os.environ.get('INVALIDATION_CHANNEL', 'store_invalidation')
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+MAX_PAYLOAD = 7900
+RECONNECT_DELAY = 1.0
+
+logger = logging.getLogger(__name__)
+
+class InvalidationBus:
+    """Applies cache invalidations locally and relays them to every other worker through NOTIFY.
+
+    Each worker numbers its notifications. A receiver that sees a gap in a sender's numbering,
+    or that lost its own listening connection, cannot tell what it missed and flushes everything.
+    """
+
+    def __init__(self, channel: str = INVALIDATION_CHANNEL):
+        self.channel = channel
+        self.origin = uuid.uuid4().hex[:12]
+        self.running = False
+        self.flushes = 0
+        self._handlers: dict[str, Callable] = {}
+        self._flush_handlers: list[Callable] = []
+        self._pending: list[list] = []
+        self._sequence = 0
+        self._last_seen: dict[str, int] = {}
+        self._wakeup = asyncio.Event()
+
+    def subscribe(self, kind: str, handler: Callable, flush: Optional[Callable] = None):
+        """Call handler(*keys) for every invalidation of kind, and flush() when messages were lost"""
+        self._handlers[kind] = handler
+        if flush is not None:
+            self._flush_handlers.append(flush)
+
+    def publish(self, kind: str, *keys):
+        """Invalidate after a committed write: here right away, in the other workers shortly after"""
+        handler = self._handlers.get(kind)
+        if handler is None:
+            return
+        handler(*keys)
+        if self.running:
+            self._pending.append([kind, *keys])
+            self._wakeup.set()
+
+    def flush(self):
+        """Drop everything the subscribed caches hold"""
+        self.flushes += 1
+        for handler in self._flush_handlers:
+            try:
+                handler()
+            except Exception:
+                logger.exception("Cache flush failed")
+
+    def _receive(self, connection, pid, channel, payload):
+        message = orjson.loads(payload)
+        origin, sequence = message["o"], message["s"]
+        if origin == self.origin:
+            return
+        last = self._last_seen.get(origin)
+        self._last_seen[origin] = sequence
+        if last is not None and sequence != last + 1:
+            logger.warning("Missed invalidations from %s (%d after %d), flushing caches", origin, sequence, last)
+            self.flush()
+            return
+        for kind, *keys in message["m"]:
+            handler = self._handlers.get(kind)
+            if handler is None:
+                continue
+            try:
+                handler(*keys)
+            except Exception:
+                logger.exception("Invalidation %s %s failed, flushing caches", kind, keys)
+                self.flush()
+
+    def _next_batch(self) -> list[list]:
+        batch, size = [], 0
+        for message in self._pending:
+            size += len(orjson.dumps(message)) + 1
+            if batch and size > MAX_PAYLOAD:
+                break
+            batch.append(message)
+        return batch
+
+    async def _send(self, connection):
+        while self._pending:
+            batch = self._next_batch()
+            self._sequence += 1
+            payload = orjson.dumps({"o": self.origin, "s": self._sequence, "m": batch}).decode()
+            del self._pending[:len(batch)]
+            await connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+
+    async def run(self):
+        """Keep a dedicated connection listening and publishing until cancelled"""
+        dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        self.running = True
+        connected_before = False
+        try:
+            while True:
+                connection = None
+                try:
+                    connection = await asyncpg.connect(dsn)
+                    await connection.add_listener(self.channel, self._receive)
+                    # Whatever was sent while this worker was not listening is lost
+                    if connected_before:
+                        self.flush()
+                    connected_before = True
+                    while not connection.is_closed():
+                        await self._send(connection)
+                        try:
+                            await asyncio.wait_for(self._wakeup.wait(), timeout=5)
+                        except asyncio.TimeoutError:
+                            pass
+                        self._wakeup.clear()
+                except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError):
+                    logger.exception("Invalidation channel failed, reconnecting")
+                finally:
+                    if connection is not None and not connection.is_closed():
+                        await connection.close()
+                await asyncio.sleep(RECONNECT_DELAY)
+        finally:
+            self.running = False
+            self._pending.clear()
+
+invalidation_bus = InvalidationBus()
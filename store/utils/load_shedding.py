@@ -0,0 +1,205 @@
+import os
+import time
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+import orjson
+from starlette.routing import Match
+
+from store.database import DB_MAX_OVERFLOW, DB_POOL_SIZE
+from store.utils.metrics import CONCURRENCY_LIMIT, SHED_REQUESTS
+from store.utils.util import PASSWORD_HASH_WORKERS
+
+# Requests that may wait for a slot once a class is at its limit, and for how long
+SHED_QUEUE_SIZE = int(os.environ.get('SHED_QUEUE_SIZE', 16))
+SHED_QUEUE_TIMEOUT = float(os.environ.get('SHED_QUEUE_TIMEOUT', 0.5))
+SHED_RETRY_AFTER = os.environ.get('SHED_RETRY_AFTER', '1')
+
+# Never limited, so the service stays observable while it sheds load
+EXEMPT_PATHS = ('/metrics',)
+
+# Reads whose cost grows with the size of a category, a book's popularity or the catalog
+HEAVY_READS = {
+    '/books/',
+    '/books/top',
+    '/books/{book_id}/similar',
+    '/books/{book_id}/reviews/',
+    '/categories/{category_id}',
+    '/authors/{author_id}/books',
+    '/changes/',
+}
+
+def _settings(variable: str) -> dict[str, float]:
+    """Parse "class=value,..." overrides from the environment"""
+    entries = (entry.split('=', 1) for entry in os.environ.get(variable, '').split(',') if entry)
+    return {name.strip(): float(value) for name, value in entries}
+
+@dataclass
+class RouteClass:
+    name: str
+    # Most concurrent requests; the adaptive limit moves between a quarter of this and this
+    max_limit: int
+    # Latency above which a completed request counts as a sign of overload
+    target_latency: float
+
+ROUTE_CLASSES = {
+    route_class.name: route_class for route_class in (
+        # Password hashing is CPU bound; more requests than hashing threads only queue
+        RouteClass("auth", PASSWORD_HASH_WORKERS * 2, 0.5),
+        RouteClass("heavy", DB_POOL_SIZE + DB_MAX_OVERFLOW, 1.0),
+        RouteClass("light", 256, 0.2),
+        RouteClass("writes", DB_POOL_SIZE + DB_MAX_OVERFLOW, 0.5),
+    )
+}
+for _name, _value in _settings('CONCURRENCY_LIMITS').items():
+    ROUTE_CLASSES[_name].max_limit = int(_value)
+for _name, _value in _settings('LATENCY_TARGETS').items():
+    ROUTE_CLASSES[_name].target_latency = _value
+
+def route_class(method: str, path: Optional[str]) -> str:
+    if path is not None and (path.startswith('/auth/') or (method == 'POST' and path == '/users/')):
+        return "auth"
+    if method not in ('GET', 'HEAD'):
+        return "writes"
+    return "heavy" if path in HEAVY_READS else "light"
+
+class AdaptiveLimiter:
+    """Concurrency limit for one route class, adjusted by AIMD on the latency of finished requests.
+
+    Every request finishing within the target latency raises the limit by 1/limit, i.e. by
+    about one per limit's worth of requests. A slow or failed request cuts it by the backoff
+    factor, at most once per target latency so one burst of slow requests counts once.
+    """
+
+    def __init__(self, route_class: RouteClass, queue_size: int = SHED_QUEUE_SIZE,
+                 queue_timeout: float = SHED_QUEUE_TIMEOUT, backoff: float = 0.9):
+        self.name = route_class.name
+        self.max_limit = route_class.max_limit
+        self.min_limit = max(1, route_class.max_limit // 4)
+        self.target_latency = route_class.target_latency
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.backoff = backoff
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+        self._gauge = CONCURRENCY_LIMIT.labels(self.name)
+        self._gauge.set(self.limit)
+
+    async def acquire(self) -> Optional[str]:
+        """Take a slot, waiting briefly if need be; returns why the request was refused, or None"""
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return None
+        if len(self._waiters) >= self.queue_size:
+            return "queue_full"
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except asyncio.TimeoutError:
+            # Granted a slot just as the wait ran out
+            if waiter.done():
+                return None
+            self._abandon(waiter)
+            return "queue_timeout"
+        except asyncio.CancelledError:
+            if waiter.done():
+                self.in_flight -= 1
+                self._wake()
+            else:
+                self._abandon(waiter)
+            raise
+        return None
+
+    def release(self, latency: float, failed: bool):
+        """Give the slot back and adapt the limit to how the request went"""
+        self.in_flight -= 1
+        now = time.monotonic()
+        if failed or latency > self.target_latency:
+            if now - self._last_decrease >= self.target_latency:
+                self._last_decrease = now
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+        else:
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+        self._gauge.set(self.limit)
+        self._wake()
+
+    def _abandon(self, waiter: asyncio.Future):
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _wake(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+class LoadSheddingMiddleware:
+    """ASGI middleware refusing requests with 503 and Retry-After once their route class is saturated.
+
+    Refusing early is cheaper than letting requests queue on the password hashing threads or
+    the connection pool until their clients have given up.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.limiters = {name: AdaptiveLimiter(route_class) for name, route_class in ROUTE_CLASSES.items()}
+
+    def _match_route(self, scope):
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route
+        return None
+
+    async def _reject(self, send):
+        body = orjson.dumps({"detail": "Server is overloaded, retry later"})
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", SHED_RETRY_AFTER.encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        route = self._match_route(scope)
+        if route is not None:
+            # Lets the metrics label refused requests by route as well
+            scope["route"] = route
+        limiter = self.limiters[route_class(scope["method"], getattr(route, "path", None))]
+        refused = await limiter.acquire()
+        if refused is not None:
+            SHED_REQUESTS.labels(limiter.name, refused).inc()
+            await self._reject(send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            limiter.release(time.monotonic() - started, status_code >= 500)
@@ -0,0 +1,116 @@
+import os
+import time
+from fastapi import Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+from sqlalchemy import event
+
+from store.database import engine
+from store.utils.query_stats import current_queries
+
+# With several uvicorn workers, point PROMETHEUS_MULTIPROC_DIR at an empty directory before
+# starting the server; every worker then writes its samples there and /metrics sums them up
+MULTIPROCESS = 'PROMETHEUS_MULTIPROC_DIR' in os.environ
+
+# Requests that matched no route share one label instead of one series per path
+UNMATCHED_ROUTE = "<unmatched>"
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency by route',
+    ['method', 'route'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+REQUESTS = Counter('http_requests_total', 'Responses by route and status code', ['method', 'route', 'status'])
+REQUESTS_IN_PROGRESS = Gauge('http_requests_in_progress', 'Requests being served', ['method'], multiprocess_mode='livesum')
+SQL_STATEMENTS = Counter('db_statements_total', 'SQL statements executed while serving a route', ['route'])
+SQL_SECONDS = Counter('db_statement_seconds_total', 'Time spent in SQL statements while serving a route', ['route'])
+QUERY_TIMEOUTS = Counter('db_query_timeouts_total', 'Requests stopped by their route time budget', ['route', 'reason'])
+CONCURRENCY_LIMIT = Gauge('http_concurrency_limit', 'Adaptive concurrency limit per route class', ['route_class'], multiprocess_mode='livesum')
+SHED_REQUESTS = Counter('http_shed_requests_total', 'Requests refused with 503 by load shedding', ['route_class', 'reason'])
+
+POOL_CONNECTIONS = Gauge('db_pool_connections', 'Open database connections', multiprocess_mode='livesum')
+POOL_CHECKED_OUT = Gauge('db_pool_checked_out', 'Connections currently checked out of the pool', multiprocess_mode='livesum')
+POOL_CHECKOUTS = Counter('db_pool_checkouts_total', 'Connection checkouts from the pool')
+
+PASSWORD_HASH_QUEUE = Gauge('argon2_queue_depth', 'Password hash operations waiting for a hashing thread', multiprocess_mode='livesum')
+PASSWORD_HASH_SECONDS = Histogram('argon2_duration_seconds', 'Time spent hashing or verifying a password', ['operation'])
+
+CACHE_LOOKUPS = Counter('cache_lookups_total', 'In-process cache lookups', ['cache', 'result'])
+COUNTER_DRIFT = Counter('counter_drift_rows_total', 'Denormalized counter values found wrong and corrected', ['counter'])
+COUNTER_LAST_DRIFT = Gauge('counter_last_drift_rows', 'Values corrected by the latest reconciliation', ['counter'], multiprocess_mode='mostrecent')
+COUNTER_RECONCILE_SECONDS = Gauge('counter_reconcile_seconds', 'Duration of the latest reconciliation', ['counter'], multiprocess_mode='mostrecent')
+CHANGE_FEED_LAG = Gauge('change_feed_lag_transactions', 'Transactions started since the oldest one still running, which the change feed waits for',
+                        multiprocess_mode='mostrecent')
+JOB_RUNS = Counter('scheduled_job_runs_total', 'Scheduled job runs by outcome', ['job', 'outcome'])
+
+SINGLE_FLIGHT_REQUESTS = Counter('singleflight_requests_total', 'Reads that ran a query (leader) or joined one in flight (coalesced)',
+                                 ['read', 'role'])
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and SQL usage per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        queries = current_queries()
+        statements, db_seconds = queries.count, queries.seconds
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_progress.dec()
+            # The router stores the matched route in the scope it was handed
+            route = scope.get("route")
+            route = getattr(route, "path", UNMATCHED_ROUTE)
+            REQUEST_LATENCY.labels(method, route).observe(elapsed)
+            REQUESTS.labels(method, route, str(status_code)).inc()
+            if queries.count != statements:
+                SQL_STATEMENTS.labels(route).inc(queries.count - statements)
+                SQL_SECONDS.labels(route).inc(queries.seconds - db_seconds)
+
+def metrics_response() -> Response:
+    """Render every metric in the Prometheus text format, summed over workers in multiprocess mode"""
+    registry = REGISTRY
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+def mark_worker_stopped():
+    """Drop the live gauges of this worker process from the multiprocess aggregate"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+@event.listens_for(engine.sync_engine, "connect")
+def _pool_connect(dbapi_connection, connection_record):
+    POOL_CONNECTIONS.inc()
+
+@event.listens_for(engine.sync_engine, "close")
+def _pool_close(dbapi_connection, connection_record):
+    POOL_CONNECTIONS.dec()
+
+@event.listens_for(engine.sync_engine, "checkout")
+def _pool_checkout(dbapi_connection, connection_record, connection_proxy):
+    POOL_CHECKOUTS.inc()
+    POOL_CHECKED_OUT.inc()
+
+@event.listens_for(engine.sync_engine, "checkin")
+def _pool_checkin(dbapi_connection, connection_record):
+    POOL_CHECKED_OUT.dec()
@@ -0,0 +1,68 @@
+import json
+import base64
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+def encode_cursor(*values) -> str:
+    """Encode the sort key of the last row of a page as an opaque cursor"""
+    raw = json.dumps(values, separators=(',', ':'), default=str).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Decode a cursor produced by encode_cursor into its sort key values"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+def _after_prefix(prefix: str) -> Optional[str]:
+    """Smallest string above every string starting with prefix in code point order, if any"""
+    prefix = prefix.rstrip('\U0010ffff')
+    if not prefix:
+        return None
+    code = ord(prefix[-1]) + 1
+    # Surrogates cannot be stored, so the next storable code point follows them
+    return prefix[:-1] + chr(0xE000 if 0xD800 <= code <= 0xDFFF else code)
+
+def prefix_range(column, prefix: str):
+    """Conditions matching values that start with prefix, as a range on (column COLLATE "C").
+
+    The "C" collation orders by code point, where the values with a prefix are one contiguous
+    range; linguistic collations may sort some of them outside it. The column needs an index
+    on that expression for the range to be served from it.
+    """
+    column = column.collate("C")
+    after = _after_prefix(prefix)
+    return (column >= prefix,) if after is None else (column >= prefix, column < after)
+
+def keyset_query(query, columns: list, cursor: Optional[str], limit: int, descending: bool = False):
+    """Order query by columns and resume after the position encoded in cursor.
+
+    One extra row is fetched so page_cursor can tell whether another page follows.
+    """
+    query = query.order_by(*[column.desc() if descending else column for column in columns]).limit(limit + 1)
+    if cursor:
+        values = decode_cursor(cursor, len(columns))
+        for value, column in zip(values, columns):
+            expected = (int, float) if column.type.python_type is float else column.type.python_type
+            if isinstance(value, bool) or not isinstance(value, expected):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+        key = tuple_(*columns) if len(columns) > 1 else columns[0]
+        after = tuple_(*values) if len(values) > 1 else values[0]
+        query = query.where(key < after if descending else key > after)
+    return query
+
+def page_cursor(rows: list, limit: int, keys: list[str]) -> Optional[str]:
+    """Cursor for the page after rows, or None when rows was the last page"""
+    if len(rows) <= limit:
+        return None
+    last = rows[limit - 1]
+    return encode_cursor(*[getattr(last, key) for key in keys])
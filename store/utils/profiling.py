@@ -0,0 +1,71 @@
+import os
+import re
+import time
+import random
+import logging
+from pathlib import Path
+
+# Profiling is only installed when PROFILE_DIR is set; otherwise requests never pass through it
+PROFILE_DIR = os.environ.get('PROFILE_DIR')
+# Requests carrying this value in the X-Profile header are always profiled
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN')
+# Fraction of all requests profiled without the header
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL', 0.001))
+
+PROFILE_HEADER = b"x-profile"
+
+logger = logging.getLogger(__name__)
+
+class ProfilingMiddleware:
+    """ASGI middleware running selected requests under pyinstrument and saving speedscope profiles"""
+
+    def __init__(self, app, directory: str = PROFILE_DIR, token: str = PROFILE_TOKEN,
+                 sample_rate: float = PROFILE_SAMPLE_RATE):
+        # Imported here so the profiler is only a dependency where profiling is switched on
+        from pyinstrument import Profiler
+        from pyinstrument.renderers import SpeedscopeRenderer
+
+        self.app = app
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.token = token.encode() if token else None
+        self.sample_rate = sample_rate
+        self._profiler_class = Profiler
+        self._renderer_class = SpeedscopeRenderer
+        # One sampling profiler per thread; concurrent requests are served unprofiled meanwhile
+        self._active = False
+
+    def _wanted(self, scope) -> bool:
+        if self._active:
+            return False
+        if self.token is not None:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER and value == self.token:
+                    return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        self._active = True
+        profiler = self._profiler_class(interval=PROFILE_INTERVAL, async_mode="enabled")
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.stop()
+            self._active = False
+            self._save(scope, profiler, time.perf_counter() - started)
+
+    def _save(self, scope, profiler, elapsed: float):
+        route = getattr(scope.get("route"), "path", scope["path"])
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', route).strip('_') or "root"
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{scope['method']}-{slug}-{elapsed * 1000:.0f}ms.speedscope.json"
+        try:
+            (self.directory / name).write_text(profiler.output(renderer=self._renderer_class()))
+        except OSError:
+            logger.exception("Could not write profile %s", name)
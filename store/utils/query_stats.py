@@ -0,0 +1,39 @@
+import time
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+
+from store.database import engine
+
+class QueryStats:
+    """Number of SQL statements executed and the time spent in them"""
+    __slots__ = ('count', 'seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar('query_stats', default=None)
+
+def track_queries() -> QueryStats:
+    """Start counting the statements executed by the current task and the code it awaits"""
+    stats = QueryStats()
+    _current_stats.set(stats)
+    return stats
+
+def current_queries() -> QueryStats:
+    """Stats of the tracking already active for the current task, or a newly started one"""
+    stats = _current_stats.get()
+    return stats if stats is not None else track_queries()
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info['query_started'] = time.perf_counter()
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += time.perf_counter() - conn.info.pop('query_started', time.perf_counter())
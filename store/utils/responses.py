@@ -0,0 +1,24 @@
+from functools import lru_cache
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+@lru_cache(maxsize=None)
+def _adapter(model) -> TypeAdapter:
+    return TypeAdapter(model)
+
+class ModelResponse(Response):
+    """JSON response for content the services already validated, serialized as the route's model.
+
+    Returning a Response from a route makes FastAPI skip validating the content against
+    response_model a second time. The content is still dumped through a cached adapter of
+    that model, so fields outside it are left out just like FastAPI's own serialization.
+    """
+    media_type = "application/json"
+
+    def __init__(self, content, model, **kwargs):
+        # render() runs inside Response.__init__
+        self.model = model
+        super().__init__(content, **kwargs)
+
+    def render(self, content) -> bytes:
+        return _adapter(self.model).dump_json(content)
@@ -0,0 +1,99 @@
+import os
+import zlib
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+from sqlalchemy import text
+
+from store.database import engine
+from store.similarity import SIMILARITY_REBUILD_INTERVAL, build_similarities
+from store.utils.change_log import CHANGE_LOG_PRUNE_INTERVAL, prune_change_log
+from store.utils.counters import reconcile_counters
+from store.utils.metrics import JOB_RUNS
+
+# Seconds between counter reconciliations; 0 disables the job
+COUNTER_RECONCILE_INTERVAL = float(os.environ.get('COUNTER_RECONCILE_INTERVAL', 3600))
+# Seconds between checks whether a job is due
+SCHEDULER_POLL_INTERVAL = float(os.environ.get('SCHEDULER_POLL_INTERVAL', 60))
+
+# Records the run and returns a row only when the previous run started at least an interval
+# ago; committed before the job starts, so a failed run is retried after the next interval
+CLAIM_RUN = text("""
+    INSERT INTO scheduled_jobs (name, last_run_at) VALUES (:name, now())
+    ON CONFLICT (name) DO UPDATE SET last_run_at = excluded.last_run_at
+    WHERE scheduled_jobs.last_run_at <= excluded.last_run_at - make_interval(secs => :interval)
+    RETURNING name
+""")
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Job:
+    name: str
+    interval: float
+    function: Callable[[], Awaitable]
+
+class JobScheduler:
+    """Runs periodic maintenance jobs inside the application process.
+
+    Every worker runs the scheduler. A run happens in the worker that takes the job's
+    advisory lock and then claims the run in scheduled_jobs, which only succeeds when the
+    last run started at least one interval ago, so each run happens once per database and
+    interval.
+    """
+
+    def __init__(self):
+        self.jobs: list[Job] = []
+
+    def add(self, name: str, interval: float, function: Callable[[], Awaitable]):
+        if interval > 0:
+            self.jobs.append(Job(name, interval, function))
+
+    async def run_once(self, job: Job) -> bool:
+        """Run the job unless another process is running it or it ran less than an interval ago"""
+        async with engine.connect() as lock_conn:
+            # A session lock on a connection outside any transaction: a transaction held open
+            # for the whole run would hold back the change feed and VACUUM until it ended
+            await lock_conn.execution_options(isolation_level="AUTOCOMMIT")
+            lock_id = zlib.crc32(job.name.encode())
+            locked = (await lock_conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": lock_id})).scalar()
+            if not locked:
+                JOB_RUNS.labels(job.name, "skipped").inc()
+                return False
+            try:
+                async with engine.begin() as conn:
+                    due = (await conn.execute(CLAIM_RUN, {"name": job.name, "interval": job.interval})).first()
+                if due is None:
+                    JOB_RUNS.labels(job.name, "not_due").inc()
+                    return False
+                await job.function()
+                JOB_RUNS.labels(job.name, "succeeded").inc()
+                return True
+            finally:
+                try:
+                    await lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": lock_id})
+                except BaseException:
+                    # The lock would outlive the pooled connection, so end its session instead
+                    await lock_conn.invalidate()
+                    raise
+
+    async def _loop(self, job: Job):
+        while True:
+            # Polled more often than the interval, so a run skipped as not yet due is not
+            # put off for a whole interval
+            await asyncio.sleep(min(job.interval, SCHEDULER_POLL_INTERVAL))
+            try:
+                await self.run_once(job)
+            except Exception:
+                JOB_RUNS.labels(job.name, "failed").inc()
+                logger.exception("Scheduled job %s failed", job.name)
+
+    async def run(self):
+        """Run every job at its interval until cancelled"""
+        await asyncio.gather(*(self._loop(job) for job in self.jobs))
+
+scheduler = JobScheduler()
+scheduler.add("reconcile_counters", COUNTER_RECONCILE_INTERVAL, reconcile_counters)
+scheduler.add("prune_change_log", CHANGE_LOG_PRUNE_INTERVAL, prune_change_log)
+scheduler.add("build_similarities", SIMILARITY_REBUILD_INTERVAL, build_similarities)
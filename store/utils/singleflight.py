@@ -0,0 +1,59 @@
+import os
+import asyncio
+from typing import Awaitable, Callable, Hashable, Optional, TypeVar
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from store.database import async_session
+from store.utils.metrics import SINGLE_FLIGHT_REQUESTS
+
+SINGLE_FLIGHT_TIMEOUT = float(os.environ.get('SINGLE_FLIGHT_TIMEOUT', 10))
+
+T = TypeVar('T')
+
+class SingleFlight:
+    """Lets concurrent identical reads share one in-flight database computation.
+
+    The computation runs in its own task with its own session, so a caller that disconnects
+    does not cancel it for the others. Its result or exception is handed to every caller
+    waiting on the key; nothing is kept once it finishes.
+    """
+
+    def __init__(self, timeout: float = SINGLE_FLIGHT_TIMEOUT):
+        self.timeout = timeout
+        self.leaders = 0
+        self.coalesced = 0
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    async def _run(self, read: Callable[[AsyncSession], Awaitable[T]], timeout: float) -> T:
+        async with async_session() as db:
+            return await asyncio.wait_for(read(db), timeout)
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved even when every waiter has gone away
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: Hashable, read: Callable[[AsyncSession], Awaitable[T]],
+                 timeout: Optional[float] = None) -> T:
+        """Return read(session), joining a computation already running for key if there is one"""
+        route = key[0] if isinstance(key, tuple) else str(key)
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.create_task(self._run(read, self.timeout if timeout is None else timeout))
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+            self.leaders += 1
+            SINGLE_FLIGHT_REQUESTS.labels(route, "leader").inc()
+        else:
+            self.coalesced += 1
+            SINGLE_FLIGHT_REQUESTS.labels(route, "coalesced").inc()
+
+        try:
+            return await asyncio.shield(task)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Timed out reading from the database")
+
+read_flight = SingleFlight()
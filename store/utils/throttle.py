@@ -0,0 +1,146 @@
+import os
+import math
+import time
+import asyncio
+import sqlite3
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
+
+THROTTLE_BACKEND = os.environ.get('THROTTLE_BACKEND', 'memory')
+THROTTLE_SQLITE_PATH = os.environ.get('THROTTLE_SQLITE_PATH', '/tmp/book_store_throttle.sqlite3')
+THROTTLE_MAX_KEYS = int(os.environ.get('THROTTLE_MAX_KEYS', 100000))
+
+def _limit(variable: str, default: str) -> tuple[float, float]:
+    """Parse "attempts/seconds" into (burst capacity, tokens refilled per second)"""
+    attempts, seconds = os.environ.get(variable, default).split('/')
+    return float(attempts), float(attempts) / float(seconds)
+
+LOGIN_IP_LIMIT = _limit('THROTTLE_LOGIN_IP', '20/60')
+LOGIN_USERNAME_LIMIT = _limit('THROTTLE_LOGIN_USERNAME', '5/60')
+REGISTER_IP_LIMIT = _limit('THROTTLE_REGISTER_IP', '10/3600')
+
+class MemoryBucketStore:
+    """Token buckets held in this process, evicting the least recently used keys"""
+
+    def __init__(self, maxsize: int = THROTTLE_MAX_KEYS):
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, capacity: float, rate: float) -> float:
+        """Take one token; return 0 if allowed, otherwise seconds until one is available"""
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * rate)
+
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / rate
+
+        # An evicted bucket is recreated full, which is where an idle one would have ended up anyway
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+class SqliteBucketStore:
+    """Token buckets in a local SQLite file, shared by every worker on the host"""
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path: str = THROTTLE_SQLITE_PATH):
+        self.path = path
+        self._conn = None
+        self._takes = 0
+        # Waiting on the file lock of another worker blocks for up to the busy timeout, so
+        # takes run on one thread of their own that also owns the connection
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="throttle")
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connect lazily so each forked worker opens its own handle
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=OFF")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL) WITHOUT ROWID"
+            )
+        return self._conn
+
+    async def take(self, key: str, capacity: float, rate: float) -> float:
+        """Take one token; return 0 if allowed, otherwise seconds until one is available"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._take, key, capacity, rate)
+
+    def _take(self, key: str, capacity: float, rate: float) -> float:
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated_at = row if row else (capacity, now)
+            tokens = min(capacity, tokens + max(0.0, now - updated_at) * rate)
+
+            retry_after = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / rate
+
+            conn.execute(
+                "INSERT INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+                (key, tokens, now)
+            )
+            self._takes += 1
+            if self._takes % self.PRUNE_EVERY == 0:
+                # Buckets idle for an hour have refilled for every limit we use
+                conn.execute("DELETE FROM buckets WHERE updated_at < ?", (now - 3600,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return retry_after
+
+class TokenBucketLimiter:
+    """Rate limit keyed by client attribute, e.g. IP address or username"""
+
+    def __init__(self, name: str, capacity: float, rate: float, store):
+        self.name = name
+        self.capacity = capacity
+        self.rate = rate
+        self.store = store
+
+    async def hit(self, key: str) -> float:
+        """Record one attempt for key and return the seconds to wait, 0 when allowed"""
+        return await self.store.take(f"{self.name}:{key}", self.capacity, self.rate)
+
+bucket_store = SqliteBucketStore() if THROTTLE_BACKEND == 'sqlite' else MemoryBucketStore()
+
+login_ip_limiter = TokenBucketLimiter("login-ip", *LOGIN_IP_LIMIT, bucket_store)
+login_username_limiter = TokenBucketLimiter("login-user", *LOGIN_USERNAME_LIMIT, bucket_store)
+register_ip_limiter = TokenBucketLimiter("register-ip", *REGISTER_IP_LIMIT, bucket_store)
+
+def _raise_throttled(retry_after: float):
+    raise HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many attempts, please try again later",
+        headers={"Retry-After": str(math.ceil(retry_after))},
+    )
+
+async def enforce_login_throttle(client_ip: str, username: str):
+    """Reject a login attempt that exceeds the per-IP or per-username limit"""
+    retry_after = await login_ip_limiter.hit(client_ip)
+    if not retry_after:
+        retry_after = await login_username_limiter.hit(username.lower())
+    if retry_after:
+        _raise_throttled(retry_after)
+
+async def enforce_register_throttle(client_ip: str):
+    """Reject a registration that exceeds the per-IP limit"""
+    retry_after = await register_ip_limiter.hit(client_ip)
+    if retry_after:
+        _raise_throttled(retry_after)
@@ -1,7 +1,10 @@
 import os
+import time
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from datetime import datetime, timedelta, timezone
-from jose import jwt
 from fastapi import HTTPException, status
 from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -9,6 +12,8 @@ from sqlalchemy.future import select
 
 from store.models.auth_model import TokenPayload, TokenResponse
 from store.models.db_model import User
+from store.utils.cache import TTLCache
+from store.utils.metrics import PASSWORD_HASH_QUEUE, PASSWORD_HASH_SECONDS
 
 load_dotenv()
 password_context = CryptContext(schemes=["argon2"], deprecated="auto")
@@ -18,6 +23,24 @@ REFRESH_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7
 ALGORITHM = os.environ['ALGORITHM']
 JWT_SECRET_KEY = os.environ['JWT_SECRET_KEY']
 JWT_REFRESH_SECRET_KEY = os.environ['JWT_REFRESH_SECRET_KEY']
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 50000))
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+
+# JWT library used to sign and verify tokens: python-jose (default) or PyJWT
+JWT_BACKEND = os.environ.get('JWT_BACKEND', 'jose')
+if JWT_BACKEND == 'pyjwt':
+    import jwt
+    JWTInvalidError = jwt.InvalidTokenError
+else:
+    from jose import jwt
+    JWTInvalidError = jwt.JWTError
+
+# Verified token payloads keyed by token digest, each kept until the token expires
+token_cache = TTLCache(ttl=REFRESH_TOKEN_EXPIRE_MINUTES * 60, maxsize=TOKEN_CACHE_SIZE, name="token")
+
+# Argon2 takes tens of milliseconds of CPU per call; requests hash on this bounded pool so the
+# event loop keeps serving, and the pool size caps how many hashes run at once
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="argon2")
 
 def get_hashed_password(password: str) -> str:
     """Hash a password using Argon2"""
@@ -27,6 +50,28 @@ def verify_hashed_password(password: str, hashed_pass: str) -> bool:
     """Verify a password against its hash"""
     return password_context.verify(password, hashed_pass)
 
+async def _run_password_operation(operation: str, function, *args):
+    duration = PASSWORD_HASH_SECONDS.labels(operation)
+
+    def run():
+        PASSWORD_HASH_QUEUE.dec()
+        with duration.time():
+            return function(*args)
+
+    PASSWORD_HASH_QUEUE.inc()
+    future = password_executor.submit(run)
+    # A call cancelled while still queued never runs, so it leaves the queue here instead
+    future.add_done_callback(lambda done: done.cancelled() and PASSWORD_HASH_QUEUE.dec())
+    return await asyncio.wrap_future(future)
+
+async def hash_password(password: str) -> str:
+    """Hash a password using Argon2 on the password hashing pool"""
+    return await _run_password_operation("hash", get_hashed_password, password)
+
+async def verify_password(password: str, hashed_pass: str) -> bool:
+    """Verify a password against its hash on the password hashing pool"""
+    return await _run_password_operation("verify", verify_hashed_password, password, hashed_pass)
+
 def generate_tokens(user_id: int) -> TokenResponse:
     """Generate access and refresh tokens for a user"""
     # Convert to string as jwt requires JSON serializable values
@@ -52,6 +97,12 @@ def create_refresh_token(data: dict) -> str:
 
 def validate_token(token: str, token_type: str) -> TokenPayload:
     """Validate a JWT token and return the token data"""
+    # Tokens already verified are served from the cache until they expire
+    cache_key = (token_type, hashlib.sha256(token.encode()).digest())
+    token_data = token_cache.get(cache_key)
+    if token_data is not None:
+        return token_data
+
     try:
         # Use the correct secret key based on token type
         key = JWT_REFRESH_SECRET_KEY if token_type == "refresh token" else JWT_SECRET_KEY
@@ -62,10 +113,11 @@ def validate_token(token: str, token_type: str) -> TokenPayload:
             token_type=payload["token_type"],
             valid=True
         )
+        token_cache.set(cache_key, token_data, ttl=payload["exp"] - time.time())
         return token_data
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"{token_type} expired")
-    except jwt.InvalidTokenError:
+    except JWTInvalidError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Invalid token, {token_type}")
 
 async def get_user_by_username(db: AsyncSession, username: str) -> User: